@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+NAS Mount Manager - Benchmark
+Legt Attrappen für smbclient, mount, umount, systemctl und sudo in ein
+temporäres Verzeichnis vorne in PATH und misst Scan, Mount, Unmount und
+Permanent-Mount end-to-end über NASMountCore - ganz ohne Netzwerk und root.
+
+Beispiele:
+  python3 bench/nas_mount_bench.py --shares 10,500,5000 --parallel 1,8,32
+  python3 bench/nas_mount_bench.py --shares 200 --latency 0.05 --failure-rate 0.02 --json
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import nas_mount_core  # noqa: E402
+from nas_mount_core import NASMountCore, PrivilegedHelper, HELPER_SCRIPT  # noqa: E402
+from nas_mount_preflight import Check  # noqa: E402
+from nas_mount_trace import TRACER  # noqa: E402
+
+HOST = '10.99.0.1'
+
+STUBS = {
+    'sudo': '''#!/bin/sh
+exec "$@"
+''',
+    'smbclient': '''#!/bin/sh
+sleep "$NAS_BENCH_SCAN_LATENCY"
+# smbclient -g: Typ|Name|Kommentar
+seq 1 "$NAS_BENCH_SHARES" | awk '{printf "Disk|share%05d|Benchmark share %d\\n", $1, $1}'
+printf 'IPC|IPC$|IPC Service\\n'
+''',
+    'mount': '''#!/bin/sh
+sleep "$NAS_BENCH_LATENCY"
+[ "$1" = "-a" ] && exit 0
+if [ "$(od -An -N2 -tu2 /dev/urandom | tr -d ' ')" -lt "$NAS_BENCH_FAIL_THRESHOLD" ]; then
+    echo "mount error(112): Host is down" >&2
+    exit 32
+fi
+# mount -t cifs //host/share /target -o options
+flock "$NAS_BENCH_MOUNTINFO.lock" sh -c \\
+    'echo "$$ 1 0:99 / $2 rw,relatime - cifs $1 rw,vers=3.0" >> "$NAS_BENCH_MOUNTINFO"' _ "$3" "$4"
+''',
+    'umount': '''#!/bin/sh
+sleep "$NAS_BENCH_LATENCY"
+if [ "$(od -An -N2 -tu2 /dev/urandom | tr -d ' ')" -lt "$NAS_BENCH_FAIL_THRESHOLD" ]; then
+    echo "umount: target is busy." >&2
+    exit 32
+fi
+for TARGET; do :; done
+flock "$NAS_BENCH_MOUNTINFO.lock" sed -i "\\\\# $TARGET rw,relatime #d" "$NAS_BENCH_MOUNTINFO"
+''',
+    'systemctl': '''#!/bin/sh
+sleep "$NAS_BENCH_LATENCY"
+''',
+}
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def install_stubs(directory):
+    bin_dir = os.path.join(directory, 'bin')
+    os.makedirs(bin_dir)
+    for name, content in STUBS.items():
+        path = os.path.join(bin_dir, name)
+        with open(path, 'w') as f:
+            f.write(content)
+        os.chmod(path, 0o755)
+    return bin_dir
+
+
+def measure(name, func, durations_of):
+    start = time.monotonic()
+    results = func()
+    elapsed = time.monotonic() - start
+    durations = durations_of(results)
+    failures = sum(1 for r in results if not getattr(r, 'ok', r))
+    return {
+        'operation': name,
+        'elapsed': elapsed,
+        'ops': len(durations),
+        'throughput': len(durations) / elapsed if elapsed else 0.0,
+        'p50': percentile(durations, 50),
+        'p99': percentile(durations, 99),
+        'failures': failures,
+    }
+
+
+def run_case(workdir, shares, parallel, args):
+    case_dir = tempfile.mkdtemp(dir=workdir)
+    mountinfo = os.path.join(case_dir, 'mountinfo')
+    fstab = os.path.join(case_dir, 'fstab')
+    mount_base = os.path.join(case_dir, 'mnt')
+    open(mountinfo, 'w').close()
+    with open(fstab, 'w') as f:
+        f.write("UUID=0000 / ext4 defaults 0 1\n")
+
+    os.environ.update({
+        'NAS_BENCH_SHARES': str(shares),
+        'NAS_BENCH_LATENCY': str(args.latency),
+        'NAS_BENCH_SCAN_LATENCY': str(args.scan_latency),
+        'NAS_BENCH_FAIL_THRESHOLD': str(int(args.failure_rate * 65536)),
+        'NAS_BENCH_MOUNTINFO': mountinfo,
+    })
+
+    config = {'max_parallel': parallel, 'mount_timeout': 30, 'unmount_deadline': 10}
+    workers = max(16, parallel)
+    helper = PrivilegedHelper(command=['sudo', sys.executable, HELPER_SCRIPT, str(workers)], workers=workers)
+    core = NASMountCore(config, helper=helper, log=(print if args.verbose else lambda message: None),
+                        cred_file=os.path.join(case_dir, 'credentials'), share_cache_file=None,
+                        fstab_path=fstab, mountinfo_path=mountinfo, unit_dir=case_dir)
+    try:
+        rows = [
+            measure('scan_shares', lambda: core.scan(HOST, 'bench', 'secret')[HOST], lambda r: [0.0] * len(r)),
+            measure('mount_all', lambda: core.mount(HOST, 'bench', 'secret', mount_base)[HOST],
+                    lambda r: [x.duration for x in r]),
+            measure('mount_all (no-op)', lambda: core.mount(HOST, 'bench', 'secret', mount_base)[HOST],
+                    lambda r: [x.duration for x in r]),
+            measure('unmount_all', lambda: core.unmount(mount_base), lambda r: [x.duration for x in r]),
+            measure('setup_permanent_mount',
+                    lambda: [core.enable_permanent(HOST, 'bench', 'secret', mount_base)], lambda r: [0.0]),
+        ]
+    finally:
+        core.close()
+    # Scan und Permanent-Mount sind ein einziger Vorgang für alle Shares: Durchsatz pro Share,
+    # aber keine Einzelzeiten, aus denen sich Perzentile ergeben würden
+    for row in (rows[0], rows[4]):
+        row['p50'] = row['p99'] = None
+        row['ops'] = shares
+        row['throughput'] = shares / row['elapsed'] if row['elapsed'] else 0.0
+    for row in rows:
+        row.update({'shares': shares, 'parallel': parallel})
+    return rows
+
+
+def format_ms(seconds):
+    return 'n/a' if seconds is None else f"{seconds * 1000:.1f}"
+
+
+def print_table(rows):
+    header = f"{'Operation':<24}{'Shares':>7}{'Par.':>6}{'Gesamt s':>10}{'Ops/s':>10}{'p50 ms':>9}{'p99 ms':>9}{'Fehler':>8}"
+    print(header)
+    print('-' * len(header))
+    for row in rows:
+        print(f"{row['operation']:<24}{row['shares']:>7}{row['parallel']:>6}{row['elapsed']:>10.2f}"
+              f"{row['throughput']:>10.1f}{format_ms(row['p50']):>9}{format_ms(row['p99']):>9}{row['failures']:>8}")
+
+
+def int_list(value):
+    return [int(part) for part in value.split(',') if part]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark für den NAS Mount Manager mit Attrappen")
+    parser.add_argument('--shares', type=int_list, default=[10, 100, 1000],
+                        help="Kommagetrennte Share-Anzahlen (10 bis 5000)")
+    parser.add_argument('--parallel', type=int_list, default=[1, 8],
+                        help="Kommagetrennte Parallelitätsstufen, 1 = seriell")
+    parser.add_argument('--latency', type=float, default=0.02, help="Sekunden pro mount/umount/systemctl")
+    parser.add_argument('--scan-latency', type=float, default=0.2, help="Sekunden pro smbclient -L")
+    parser.add_argument('--failure-rate', type=float, default=0.0, help="Anteil fehlschlagender mount- und umount-Aufrufe (0-1); "
+                             "smbclient schlägt nie fehl, sonst fiele der ganze Lauf aus")
+    parser.add_argument('--json', action='store_true', help="Ergebnisse als JSON ausgeben")
+    parser.add_argument('-v', '--verbose', action='store_true', help="Log-Ausgabe des Kerns anzeigen")
+    parser.add_argument('--trace', metavar='DATEI', help="Alle externen Aufrufe als Chrome-Trace-JSON speichern")
+    args = parser.parse_args(argv)
+
+    if not shutil.which('flock'):
+        parser.error("flock (util-linux) wird für die mount/umount-Attrappen benötigt")
+
+    # systemctl ist eine Attrappe: den systemd-Pfad auch auf Rechnern ohne laufendes systemd messen
+    nas_mount_core.check_systemd = lambda: Check('systemd', True, "Attrappe", None)
+    workdir = tempfile.mkdtemp(prefix='nas_mount_bench_')
+    original_path = os.environ.get('PATH', '')
+    os.environ['PATH'] = install_stubs(workdir) + os.pathsep + original_path
+    rows = []
+    try:
+        for shares in args.shares:
+            for parallel in args.parallel:
+                rows.extend(run_case(workdir, shares, parallel, args))
+    finally:
+        os.environ['PATH'] = original_path
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.trace:
+        TRACER.export_chrome(args.trace)
+    if args.json:
+        json.dump(rows, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    else:
+        print_table(rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+NAS Mount Manager - Kommandozeile
+Scan, Mount, Unmount, Status und Permanent-Mount ohne GUI (cron, systemd, SSH).
+Ergebnisse werden als JSON auf stdout ausgegeben, Fortschritt mit -v auf stderr.
+
+Beispiele:
+  nas_mount_cli.py scan 192.168.0.11 192.168.0.12
+  nas_mount_cli.py -u admin --credentials ~/.smbcredentials mount 192.168.0.0/24
+  nas_mount_cli.py status
+  nas_mount_cli.py --trace mount.json --trace-summary mount 192.168.0.11
+  nas_mount_cli.py tune 192.168.0.11 --share Media
+  nas_mount_cli.py --include 'Foto*' --exclude 're:(?i)backup' mount 192.168.0.11
+  nas_mount_cli.py -v fleet --profile buero --profile archiv
+  nas_mount_cli.py -u admin monitor --metrics-file /var/lib/node_exporter/textfile_collector/nas_mount.prom
+"""
+
+import argparse
+import json
+import os
+import signal
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from nas_mount_core import (NASMountCore, Cancelled, DiscoveryError, HelperError, CONFIG_FILE, CRED_FILE,
+                            is_host_range, load_config, read_credentials, save_config)
+from nas_mount_fleet import FleetMounter, format_status, load_profiles
+from nas_mount_monitor import ShareMonitor
+from nas_mount_trace import TRACER
+
+
+def share_dicts(shares):
+    return [share._asdict() for share in shares]
+
+
+def make_logger(verbose):
+    def log(message):
+        if verbose:
+            print(message, file=sys.stderr, flush=True)
+    return log
+
+
+def resolve_credentials(args, config):
+    username, password = read_credentials(args.credentials)
+    username = args.username or username or config.get('username', '')
+    password = os.environ.get(args.password_env, '') or password
+    return username, password
+
+
+def mount_base(args, spec):
+    # Mehrere Hosts bekommen eigene Unterverzeichnisse; Bereiche legt der Kern selbst so an
+    if len(args.hosts) == 1 or is_host_range(spec):
+        return args.mount_path
+    return os.path.join(args.mount_path, spec)
+
+
+def for_each_spec(core, specs, func):
+    """Führt func(spec) für alle IPs/Bereiche parallel aus und führt die {host: Ergebnis}-Dicts zusammen."""
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, len(specs))) as pool:
+        futures = {spec: pool.submit(func, spec) for spec in specs}
+        for spec, future in futures.items():
+            try:
+                results.update(future.result())
+            except (DiscoveryError, HelperError, Cancelled, OSError, ValueError) as e:
+                core.log(f"❌ {spec}: {e}")
+                results[spec] = {'error': str(e)}
+    return results
+
+
+def cmd_scan(core, args, username, password):
+    def scan(spec):
+        return {host: share_dicts(shares)
+                for host, shares in core.scan(spec, username, password, refresh=args.refresh).items()}
+
+    results = for_each_spec(core, args.hosts, scan)
+    ok = all(isinstance(result, list) for result in results.values())
+    return ok, {'command': 'scan', 'hosts': results}
+
+
+def cmd_mount(core, args, username, password):
+    if not (username and password):
+        return False, {'command': 'mount', 'error': "Benutzername und Passwort erforderlich"}
+
+    def mount(spec):
+        return {host: [result._asdict() for result in results]
+                for host, results in core.mount(spec, username, password, mount_base(args, spec)).items()}
+
+    results = for_each_spec(core, args.hosts, mount)
+    ok = all(isinstance(result, list) and all(r['ok'] for r in result) for result in results.values())
+    return ok, {'command': 'mount', 'hosts': results}
+
+
+def cmd_reconcile(core, args, username, password):
+    if not (username and password):
+        return False, {'command': 'reconcile', 'error': "Benutzername und Passwort erforderlich"}
+
+    def reconcile(spec):
+        return {host: {'mounted': [r._asdict() for r in result['mounted']],
+                       'unmounted': [r._asdict() for r in result['unmounted']],
+                       'unchanged': result['unchanged'],
+                       'warmed': [w._asdict() for w in result['warmed']]}
+                for host, result in core.reconcile(spec, username, password, mount_base(args, spec),
+                                                   prune=not args.keep_stale).items()}
+
+    results = for_each_spec(core, args.hosts, reconcile)
+    ok = all('error' not in result and all(r['ok'] for r in result['mounted'] + result['unmounted'])
+             for result in results.values())
+    return ok, {'command': 'reconcile', 'hosts': results}
+
+
+def cmd_unmount(core, args, username, password):
+    results = [result._asdict() for result in core.unmount(args.mount_path)]
+    return all(r['ok'] for r in results), {'command': 'unmount', 'mount_path': args.mount_path,
+                                           'results': results}
+
+
+def cmd_status(core, args, username, password):
+    mounts = [{'source': entry.source, 'mount_point': entry.mount_point, 'fstype': entry.fstype,
+               'options': entry.super_options} for entry in core.mounted(args.mount_path)]
+    return True, {'command': 'status', 'mount_path': args.mount_path, 'mounts': mounts,
+                  'permanent': core.permanent_enabled()}
+
+
+def cmd_enable_permanent(core, args, username, password):
+    if len(args.hosts) != 1:
+        return False, {'command': 'enable-permanent', 'error': "Genau ein Host erforderlich"}
+    if not (username and password):
+        return False, {'command': 'enable-permanent', 'error': "Benutzername und Passwort erforderlich"}
+    ok = core.enable_permanent(args.hosts[0], username, password, args.mount_path)
+    return ok, {'command': 'enable-permanent', 'host': args.hosts[0], 'ok': ok}
+
+
+def cmd_tune(core, args, username, password):
+    if len(args.hosts) != 1 or is_host_range(args.hosts[0]):
+        return False, {'command': 'tune', 'error': "Genau ein Host erforderlich"}
+    if not (username and password):
+        return False, {'command': 'tune', 'error': "Benutzername und Passwort erforderlich"}
+    tuned = core.tune(args.hosts[0], username, password, args.mount_path, shares=args.shares)
+    # Nur die Messergebnisse speichern, nicht die Überschreibungen von der Kommandozeile (-j, --exclude, ...)
+    stored = load_config(args.config)
+    stored['tuned_options'] = core.config['tuned_options']
+    save_config(stored, args.config)
+    return bool(tuned), {'command': 'tune', 'host': args.hosts[0], 'options': tuned}
+
+
+def cmd_monitor(core, args, username, password):
+    config = core.config
+    monitor = ShareMonitor(core, args.mount_path, username, password, interval=config['monitor_interval'],
+                           slow_threshold=config['monitor_slow_threshold'], workers=core.max_parallel,
+                           metrics_file=args.metrics_file or config['metrics_file'], log=core.log)
+    if args.once:
+        healths = monitor.check()
+    else:
+        # Als Dienst: bis SIGTERM/SIGINT laufen, dann den Stand des letzten Durchlaufs ausgeben
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda signum, frame: monitor.stop())
+        monitor.run()
+        healths = list(monitor.healths.values())
+    shares = [{'mount_point': h.entry.mount_point, 'host': h.host, 'share': h.share, 'status': h.status,
+               'latency': h.last_latency, 'errors': h.errors, 'remounts': h.remounts} for h in healths]
+    return all(h.status != 'stale' for h in healths), {'command': 'monitor', 'mount_path': args.mount_path,
+                                                        'shares': shares}
+
+
+def cmd_fleet(core, args, username, password):
+    # Zugangsdaten kommen pro Profil aus dessen Credentials-Datei
+    profiles = load_profiles(core.config, args.profiles)
+    last = [None]
+
+    def on_progress(status):
+        # Nur bei Änderungen der erledigten Profile ausgeben, nicht pro Share
+        if status.profiles_done != last[0]:
+            last[0] = status.profiles_done
+            core.log(format_status(status))
+
+    results = FleetMounter(core, log=core.log, on_progress=on_progress).run(profiles)
+    output = {}
+    for name, result in results.items():
+        if 'error' in result:
+            output[name] = result
+            continue
+        output[name] = {host: {'mounted': [r._asdict() for r in host_result['mounted']],
+                               'unchanged': host_result['unchanged'],
+                               'warmed': [w._asdict() for w in host_result['warmed']]}
+                        for host, host_result in result.items()}
+    ok = all('error' not in result and all(r['ok'] for host in result.values() for r in host['mounted'])
+             for result in output.values())
+    return ok, {'command': 'fleet', 'profiles': output}
+
+
+def cmd_preflight(core, args, username, password):
+    checks, packages = core.check_environment(refresh=args.refresh)
+    installed = None
+    if packages and args.install:
+        installed = core.install_packages(packages)
+        checks, packages = core.check_environment(refresh=True)
+    result = {'command': 'preflight', 'checks': [check._asdict() for check in checks],
+              'missing_packages': packages}
+    if installed is not None:
+        result['installed'] = installed
+    return all(check.ok for check in checks), result
+
+
+def cmd_disable_permanent(core, args, username, password):
+    ok = core.disable_permanent(args.mount_path)
+    return ok, {'command': 'disable-permanent', 'ok': ok}
+
+
+COMMANDS = {
+    'scan': (cmd_scan, True),
+    'mount': (cmd_mount, True),
+    'reconcile': (cmd_reconcile, True),
+    'unmount': (cmd_unmount, False),
+    'status': (cmd_status, False),
+    'enable-permanent': (cmd_enable_permanent, True),
+    'disable-permanent': (cmd_disable_permanent, False),
+    'tune': (cmd_tune, True),
+    'monitor': (cmd_monitor, False),
+    'preflight': (cmd_preflight, False),
+    'fleet': (cmd_fleet, False),
+}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="NAS Mount Manager (CLI)")
+    parser.add_argument('--config', default=str(CONFIG_FILE), help="Konfigurationsdatei")
+    parser.add_argument('-u', '--username', help="SMB-Benutzername")
+    parser.add_argument('--credentials', default=str(CRED_FILE),
+                        help=f"Credentials-Datei mit username=/password= (Standard: {CRED_FILE})")
+    parser.add_argument('--password-env', default='NAS_PASSWORD',
+                        help="Umgebungsvariable mit dem Passwort (Standard: NAS_PASSWORD)")
+    parser.add_argument('-m', '--mount-path', help="Mount-Basisverzeichnis")
+    parser.add_argument('-j', '--parallel', type=int, help="Maximale parallele Operationen pro Host")
+    parser.add_argument('--include', action='append',
+                        help="Nur Shares, die auf das Muster passen (Glob oder re:<regex>, mehrfach möglich)")
+    parser.add_argument('--exclude', action='append',
+                        help="Shares, die auf das Muster passen, auslassen (zusätzlich zur Konfiguration)")
+    parser.add_argument('--warmup', action='store_true',
+                        help="Nach dem Mount Verzeichnisse vorladen (Tiefe/Budget aus der Konfiguration)")
+    parser.add_argument('-v', '--verbose', action='store_true', help="Fortschritt auf stderr ausgeben")
+    parser.add_argument('--trace', metavar='DATEI', help="Alle externen Aufrufe als Chrome-Trace-JSON speichern")
+    parser.add_argument('--trace-summary', action='store_true',
+                        help="Tabelle der langsamsten Aufrufe auf stderr ausgeben")
+
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    for name, (_, takes_hosts) in COMMANDS.items():
+        sub = subparsers.add_parser(name)
+        if takes_hosts:
+            sub.add_argument('hosts', nargs='*', help="IP-Adressen oder Bereiche (CIDR, a.b.c.d-e)")
+        if name == 'reconcile':
+            sub.add_argument('--keep-stale', action='store_true',
+                             help="Mounts nicht mehr vorhandener Shares nicht aushängen")
+        if name == 'tune':
+            sub.add_argument('--share', dest='shares', action='append',
+                             help="Nur diesen Share optimieren (mehrfach möglich)")
+        if name == 'monitor':
+            sub.add_argument('--once', action='store_true', help="Nur einen Prüfdurchlauf ausführen")
+            sub.add_argument('--metrics-file',
+                             help="Prometheus-Textfile, z.B. /var/lib/node_exporter/textfile_collector/nas_mount.prom")
+        if name == 'fleet':
+            sub.add_argument('--profile', dest='profiles', action='append',
+                             help="Nur dieses Profil mounten (mehrfach möglich)")
+        if name == 'preflight':
+            sub.add_argument('--refresh', action='store_true', help="Cache ignorieren und neu prüfen")
+            sub.add_argument('--install', action='store_true', help="Fehlende Pakete installieren")
+        if name == 'scan':
+            sub.add_argument('--cached', dest='refresh', action='store_false',
+                             help="Share-Cache verwenden statt neu zu scannen")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    config = load_config(args.config)
+    if args.parallel:
+        config['max_parallel'] = args.parallel
+    if args.warmup:
+        config['warmup'] = True
+    if args.include:
+        config['share_include'] = args.include
+    if args.exclude:
+        config['share_exclude'] = config['share_exclude'] + args.exclude
+    args.mount_path = args.mount_path or config['mount_path']
+    if getattr(args, 'hosts', None) == []:
+        args.hosts = [config['nas_ip']]
+
+    username, password = resolve_credentials(args, config)
+    func, _ = COMMANDS[args.command]
+    core = NASMountCore(config, log=make_logger(args.verbose))
+    # Strg+C bricht laufende Befehle sauber ab; das Ergebnis wird trotzdem ausgegeben
+    signal.signal(signal.SIGINT, lambda signum, frame: core.cancel())
+    try:
+        ok, result = func(core, args, username, password)
+    except (DiscoveryError, HelperError, Cancelled, OSError, ValueError) as e:
+        ok, result = False, {'command': args.command, 'error': str(e)}
+    finally:
+        core.close()
+
+    if args.trace:
+        TRACER.export_chrome(args.trace)
+    if args.trace_summary:
+        print(TRACER.summary(), file=sys.stderr)
+    json.dump(result, sys.stdout, indent=2, ensure_ascii=False)
+    sys.stdout.write("\n")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
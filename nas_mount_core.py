@@ -0,0 +1,1137 @@
+#!/usr/bin/env python3
+"""
+NAS Mount Manager - Kern-Funktionen ohne GUI
+Share-Erkennung mit Cache, Netzwerk-Scan nach SMB-Hosts,
+privilegierter Helfer-Prozess und paralleles Mounten/Unmounten mit begrenztem Worker-Pool.
+Wird von der GUI (nas_mount_gui.py) und der CLI (nas_mount_cli.py) genutzt;
+importiert kein tkinter.
+"""
+
+import os
+import fnmatch
+import ipaddress
+import itertools
+import json
+import re
+import signal
+import subprocess
+import sys
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from nas_mount_table import MountTable, MOUNTINFO, split_unc
+import nas_mount_units
+from nas_mount_trace import TRACER, redact, traced
+from nas_mount_engine import CommandEngine, Cancelled, DEFAULT_MAX_TOTAL
+from nas_mount_fstab import FstabEntry, FstabManager, has_changes
+from nas_mount_preflight import Preflight, PREFLIGHT_CACHE_FILE, check_systemd, missing_packages, package_manager
+from nas_mount_warmup import MetadataWarmer
+from nas_mount_tune import MountTuner, DEFAULT_OPTIONS as DEFAULT_TUNED_OPTIONS, tuned_key
+
+DEFAULT_MAX_PARALLEL = 8
+DEFAULT_MOUNT_TIMEOUT = 30
+DEFAULT_SCAN_TIMEOUT = 30
+DEFAULT_DISCOVERY_TTL = 300
+DEFAULT_PROBE_TIMEOUT = 0.5
+DEFAULT_PROBE_CONCURRENCY = 256
+MAX_SWEEP_HOSTS = 65536
+DEFAULT_UNMOUNT_DEADLINE = 10
+DEFAULT_LIVENESS_TIMEOUT = 2
+SMB_PORTS = (445, 139)
+SHARE_TYPES = ('Disk', 'Printer', 'Device', 'IPC')
+BLOCKING_PROCESS_NAMES = ('kioworker',)
+
+DEFAULT_CONFIG = {
+    'nas_ip': '192.168.0.11',
+    'username': '',
+    'mount_path': '/mnt/nas',
+    'permanent': False,
+    'max_parallel': DEFAULT_MAX_PARALLEL,
+    'max_total_parallel': DEFAULT_MAX_TOTAL,
+    'mount_timeout': DEFAULT_MOUNT_TIMEOUT,
+    'unmount_deadline': DEFAULT_UNMOUNT_DEADLINE,
+    'discovery_ttl': DEFAULT_DISCOVERY_TTL,
+    # Glob-Muster oder 're:<regex>'; versteckte Shares (C$, ADMIN$) werden standardmäßig nicht gemountet
+    'share_include': [],
+    'share_exclude': ['*$'],
+    'permanent_backend': 'systemd',
+    'automount_idle': nas_mount_units.DEFAULT_IDLE_TIMEOUT,
+    'fstab_backups': 5,
+    'tuned_options': {},
+    'tune_size_mb': 64,
+    'monitor_interval': 30,
+    'monitor_slow_threshold': 2.0,
+    'metrics_file': '',
+    'warmup': False,
+    'warmup_depth': 2,
+    'warmup_max_entries': 10000,
+    'warmup_workers': 8,
+    'profiles': [],
+    'fleet_parallel_profiles': 4,
+    'log_max_lines': 2000,
+    'log_file': '',
+}
+CONFIG_FILE = Path.home() / '.nas_mount_config.json'
+CRED_FILE = Path.home() / '.smbcredentials'
+SHARE_CACHE_FILE = Path.home() / '.nas_mount_shares.json'
+HELPER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nas_mount_helper.py')
+
+Share = namedtuple('Share', 'name type comment')
+MountResult = namedtuple('MountResult', 'share mount_point ok duration error')
+ReconcilePlan = namedtuple('ReconcilePlan', 'to_mount to_remount to_remount_points stale unchanged')
+UnmountResult = namedtuple('UnmountResult', 'mount_point ok duration method hung error')
+OpResult = namedtuple('OpResult', 'returncode stdout stderr duration')
+
+
+class DiscoveryError(Exception):
+    pass
+
+
+class HelperError(Exception):
+    pass
+
+
+def run_command(args, timeout=120, env=None, share=''):
+    token = TRACER.begin(os.path.basename(args[0]), args, share)
+    try:
+        result = subprocess.run(args, capture_output=True, text=True, timeout=timeout,
+                                env=None if env is None else {**os.environ, **env})
+        returncode, stdout, stderr = result.returncode, result.stdout, result.stderr
+    except subprocess.TimeoutExpired:
+        returncode, stdout, stderr = 1, "", f"Timeout nach {timeout} Sekunden"
+    except Exception as e:
+        returncode, stdout, stderr = 1, "", str(e)
+    TRACER.end(token, returncode, stderr)
+    return returncode, stdout, stderr
+
+
+def load_config(path=CONFIG_FILE):
+    config = dict(DEFAULT_CONFIG)
+    try:
+        with open(path, 'r') as f:
+            config.update(json.load(f))
+    except (OSError, ValueError):
+        pass
+    return config
+
+
+def save_config(config, path=CONFIG_FILE):
+    try:
+        with open(path, 'w') as f:
+            json.dump(config, f, indent=2)
+    except OSError:
+        pass
+
+
+def read_credentials(path=CRED_FILE):
+    credentials = {}
+    try:
+        with open(path, 'r') as f:
+            for line in f:
+                key, _, value = line.strip().partition('=')
+                if key in ('username', 'password'):
+                    credentials[key] = value
+    except OSError:
+        pass
+    return credentials.get('username', ''), credentials.get('password', '')
+
+
+def safe_share_name(share):
+    return share.replace(' ', '_').replace('/', '_')
+
+
+def _op_share(params):
+    """Worauf sich eine Helfer-Operation bezieht, für die Share-Spalte im Trace."""
+    paths = params.get('paths') or []
+    return params.get('source') or params.get('target') or params.get('path') or (paths[0] if len(paths) == 1 else '')
+
+
+class PrivilegedHelper:
+    """Client für nas_mount_helper.py: ein sudo-Prozess pro Sitzung, Operationen als JSON-Zeilen."""
+
+    def __init__(self, command=None, workers=16):
+        self.command = command or ['sudo', sys.executable, HELPER_SCRIPT, str(workers)]
+        # Threads im Helfer; bei eigenem command muss workers dazu passen
+        self.workers = workers
+        self._process = None
+        self._pending = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._process and self._process.poll() is None:
+                return
+            self._process = subprocess.Popen(self.command, stdin=subprocess.PIPE,
+                                             stdout=subprocess.PIPE, text=True, bufsize=1)
+            process = self._process
+        threading.Thread(target=self._read_responses, args=(process,), daemon=True).start()
+
+    def _read_responses(self, process):
+        for line in process.stdout:
+            try:
+                response = json.loads(line)
+            except ValueError:
+                continue
+            with self._lock:
+                future = self._pending.pop(response.get('id'), None)
+            # Aufgegebene (abgebrochene) Operationen können später noch antworten
+            if future and not future.done():
+                try:
+                    future.set_result(OpResult(response['returncode'], response['stdout'],
+                                               response['stderr'], response['duration']))
+                except InvalidStateError:
+                    pass
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            try:
+                future.set_exception(HelperError("Privilegierter Helfer wurde beendet"))
+            except InvalidStateError:
+                pass
+
+    def submit(self, op, **params):
+        self.start()
+        future = Future()
+        token = TRACER.begin(op, f"{op} {json.dumps(redact(params), ensure_ascii=False)}", _op_share(params))
+        future.add_done_callback(lambda done: self._trace(token, done))
+        with self._lock:
+            request_id = next(self._ids)
+            future.request_id = request_id
+            self._pending[request_id] = future
+            try:
+                self._process.stdin.write(json.dumps({'id': request_id, 'op': op, **params}) + "\n")
+                self._process.stdin.flush()
+            except OSError as e:
+                self._pending.pop(request_id, None)
+                TRACER.end(token, -1, str(e))
+                raise HelperError(f"Privilegierter Helfer nicht erreichbar: {e}")
+        return future
+
+    def call(self, op, **params):
+        return self.submit(op, **params).result()
+
+    @staticmethod
+    def _trace(token, future):
+        if future.cancelled():
+            TRACER.end(token, 130, "Abgebrochen")
+            return
+        error = future.exception()
+        if error:
+            TRACER.end(token, -1, str(error))
+        else:
+            result = future.result()
+            TRACER.end(token, result.returncode, result.stderr)
+
+    def run_batch(self, operations):
+        """Sendet alle Operationen auf einmal; sie laufen im Helfer parallel."""
+        futures = [self.submit(op, **params) for op, params in operations]
+        return [future.result() for future in futures]
+
+    def cancel(self, futures):
+        """Beendet die Befehle hinter diesen Operationen; ihre Futures liefern dann Exit-Code 130."""
+        ids = [future.request_id for future in futures if not future.done()]
+        if not ids:
+            return
+        with self._lock:
+            if not self._process:
+                return
+            try:
+                self._process.stdin.write(json.dumps({'op': 'cancel', 'ids': ids}) + "\n")
+                self._process.stdin.flush()
+            except OSError:
+                pass
+
+    def close(self):
+        with self._lock:
+            process, self._process = self._process, None
+        if process and process.poll() is None:
+            try:
+                process.stdin.write(json.dumps({'op': 'exit'}) + "\n")
+                process.stdin.close()
+                process.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                process.kill()
+
+
+def iter_share_records(lines):
+    """Liest die Ausgabe von 'smbclient -g -L' (Typ|Name|Kommentar) Zeile für Zeile.
+    Namen bleiben unverändert, auch mit Leerzeichen am Anfang oder Ende; Server- und
+    Workgroup-Zeilen sowie Meldungen ohne Trennzeichen werden übersprungen."""
+    for line in lines:
+        fields = line.rstrip('\r\n').split('|', 2)
+        if len(fields) < 2 or fields[0] not in SHARE_TYPES or not fields[1]:
+            continue
+        yield Share(fields[1], fields[0], fields[2] if len(fields) > 2 else '')
+
+
+def parse_share_list(output, share_filter=None):
+    records = iter_share_records(output.split('\n'))
+    return list(share_filter.apply(records) if share_filter else records)
+
+
+class ShareFilter:
+    """Include/Exclude-Regeln für Share-Namen. Glob-Muster ohne Beachtung der Groß-/Kleinschreibung,
+    mit 're:' ein regulärer Ausdruck (re.search). Ohne include sind alle Shares der Typen gewählt."""
+
+    def __init__(self, include=(), exclude=(), types=('Disk',)):
+        self.patterns = (list(include), list(exclude), list(types))
+        self.include = [self._compile(pattern) for pattern in include]
+        self.exclude = [self._compile(pattern) for pattern in exclude]
+        self.types = set(types)
+
+    @staticmethod
+    def _compile(pattern):
+        try:
+            if pattern.startswith('re:'):
+                return re.compile(pattern[3:]).search
+            return re.compile(fnmatch.translate(pattern), re.IGNORECASE).match
+        except re.error as e:
+            raise ValueError(f"Ungültiges Muster {pattern!r}: {e}")
+
+    @property
+    def key(self):
+        return json.dumps(self.patterns, separators=(',', ':'))
+
+    def matches(self, name):
+        return ((not self.include or any(match(name) for match in self.include))
+                and not any(match(name) for match in self.exclude))
+
+    def apply(self, shares):
+        return (share for share in shares if share.type in self.types and self.matches(share.name))
+
+
+class ShareDiscovery:
+    """Ermittelt die Shares eines Hosts per smbclient und cached sie pro (Host, Benutzer, Filter).
+    Der Filter wird schon beim Lesen der smbclient-Ausgabe angewendet."""
+
+    def __init__(self, cache_file=None, ttl=DEFAULT_DISCOVERY_TTL, timeout=DEFAULT_SCAN_TIMEOUT, engine=None,
+                 share_filter=None):
+        self.cache_file = Path(cache_file) if cache_file else None
+        self.ttl = ttl
+        self.timeout = timeout
+        self.engine = engine
+        self.share_filter = share_filter or ShareFilter()
+        self._cache = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _key(self, host, username):
+        return f"{host}|{username or ''}|{self.share_filter.key}"
+
+    def _load(self):
+        if not self.cache_file or not self.cache_file.exists():
+            return
+        try:
+            with open(self.cache_file, 'r') as f:
+                data = json.load(f)
+            for key, entry in data.items():
+                self._cache[key] = (entry['time'], [Share(*s) for s in entry['shares']])
+        except (OSError, ValueError, KeyError, TypeError):
+            self._cache = {}
+
+    def _save(self):
+        if not self.cache_file:
+            return
+        data = {key: {'time': stamp, 'shares': [list(s) for s in shares]}
+                for key, (stamp, shares) in self._cache.items()}
+        try:
+            with open(self.cache_file, 'w') as f:
+                json.dump(data, f, indent=2)
+            os.chmod(self.cache_file, 0o600)
+        except OSError:
+            pass
+
+    def cached(self, host, username=''):
+        with self._lock:
+            entry = self._cache.get(self._key(host, username))
+        if entry and time.time() - entry[0] < self.ttl:
+            return entry[1]
+        return None
+
+    def invalidate(self, host=None, username=''):
+        with self._lock:
+            if host is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(self._key(host, username), None)
+            self._save()
+
+    def enumerate(self, host, username='', password='', port=None):
+        if username and password:
+            args = ['smbclient', '-g', '-L', f"//{host}", '-U', username]
+            env = {'PASSWD': password}
+        else:
+            args = ['smbclient', '-g', '-L', f"//{host}", '-N']
+            env = None
+        if port and port not in SMB_PORTS:
+            args += ['-p', str(port)]
+        if self.engine:
+            returncode, stdout, stderr = self.engine.run(args, 'enumerate', host=host, env=env,
+                                                         timeout=self.timeout, share=f"//{host}")
+        else:
+            returncode, stdout, stderr = run_command(args, timeout=self.timeout, env=env, share=f"//{host}")
+        if returncode != 0:
+            raise DiscoveryError(stderr.strip() or f"smbclient Exit-Code {returncode}")
+        return parse_share_list(stdout, self.share_filter)
+
+    def get_shares(self, host, username='', password='', refresh=False, port=None):
+        if not refresh:
+            shares = self.cached(host, username)
+            if shares is not None:
+                return shares
+        shares = self.enumerate(host, username, password, port)
+        with self._lock:
+            self._cache[self._key(host, username)] = (time.time(), shares)
+            self._save()
+        return shares
+
+
+def expand_targets(spec):
+    """Wandelt '192.168.0.0/24', '192.168.0.10-192.168.0.50' oder '192.168.0.10-50' in IP-Adressen um."""
+    spec = spec.strip()
+    if '-' in spec:
+        first, last = (part.strip() for part in spec.split('-', 1))
+        start = ipaddress.IPv4Address(first)
+        if '.' not in last:
+            last = f"{first.rsplit('.', 1)[0]}.{last}"
+        end = ipaddress.IPv4Address(last)
+        if end < start:
+            raise ValueError(f"Ungültiger Bereich: {spec}")
+        count = int(end) - int(start) + 1
+        if count > MAX_SWEEP_HOSTS:
+            raise ValueError(f"Bereich zu groß: {count} Adressen")
+        return [str(ipaddress.IPv4Address(i)) for i in range(int(start), int(end) + 1)]
+    network = ipaddress.ip_network(spec, strict=False)
+    if network.num_addresses > MAX_SWEEP_HOSTS:
+        raise ValueError(f"Bereich zu groß: {network.num_addresses} Adressen")
+    hosts = list(network.hosts()) or [network.network_address]
+    return [str(host) for host in hosts]
+
+
+def is_host_range(spec):
+    if '/' not in spec and '-' not in spec:
+        return False
+    try:
+        expand_targets(spec)
+    except ValueError:
+        return False
+    return True
+
+
+async def _probe_port(host, port, timeout):
+    import asyncio
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    except (OSError, asyncio.TimeoutError):
+        return False
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+    return True
+
+
+async def _probe_hosts(hosts, ports, timeout, concurrency):
+    import asyncio
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def probe(host):
+        async with semaphore:
+            results = await asyncio.gather(*(_probe_port(host, port, timeout) for port in ports))
+        return host, [port for port, ok in zip(ports, results) if ok]
+
+    found = {}
+    for host, open_ports in await asyncio.gather(*(probe(host) for host in hosts)):
+        if open_ports:
+            found[host] = open_ports
+    return found
+
+
+def probe_smb_hosts(hosts, ports=SMB_PORTS, timeout=DEFAULT_PROBE_TIMEOUT,
+                    concurrency=DEFAULT_PROBE_CONCURRENCY):
+    # asyncio wird nur für den Netzwerk-Scan gebraucht; spät importieren hält den CLI-Start schlank
+    import asyncio
+    return asyncio.run(_probe_hosts(list(hosts), tuple(ports), timeout, max(1, concurrency)))
+
+
+class SubnetSweep:
+    """Sucht SMB-Hosts in einem IP-Bereich und listet die Shares aller gefundenen Hosts."""
+
+    def __init__(self, discovery, ports=SMB_PORTS, timeout=DEFAULT_PROBE_TIMEOUT,
+                 concurrency=DEFAULT_PROBE_CONCURRENCY, max_parallel=DEFAULT_MAX_PARALLEL, log=print, engine=None):
+        self.discovery = discovery
+        self.ports = tuple(ports)
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.max_parallel = max(1, int(max_parallel))
+        self.log = log
+        self.engine = engine
+
+    def probe(self, spec):
+        hosts = expand_targets(spec)
+        if self.engine:
+            return self.engine.run_coroutine(
+                lambda: _probe_hosts(hosts, self.ports, self.timeout, max(1, self.concurrency)))
+        return probe_smb_hosts(hosts, self.ports, self.timeout, self.concurrency)
+
+    def run(self, spec, username='', password='', refresh=False):
+        start = time.monotonic()
+        found = self.probe(spec)
+        self.log(f"📡 {len(found)} SMB-Hosts gefunden ({time.monotonic() - start:.1f}s)")
+        if not found:
+            return {}
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=min(self.max_parallel, len(found))) as pool:
+            futures = {pool.submit(TRACER.bind(self.discovery.get_shares), host, username, password,
+                                   refresh, ports[0]): host
+                       for host, ports in found.items()}
+            for future in as_completed(futures):
+                host = futures[future]
+                try:
+                    shares = future.result()
+                except DiscoveryError as e:
+                    self.log(f"❌ {host:<15} → {e}")
+                    continue
+                results[host] = shares
+                self.log(f"✅ {host:<15} → {len(shares)} Shares")
+        return {host: results[host] for host in found if host in results}
+
+
+def base_mount_options(username):
+    return f"username={username},uid=1000,gid=1000,file_mode=0777,dir_mode=0777,soft,_netdev"
+
+
+class MountEngine:
+    def __init__(self, helper, max_parallel=DEFAULT_MAX_PARALLEL, timeout=DEFAULT_MOUNT_TIMEOUT, log=print,
+                 tuned_options=None):
+        self.helper = helper
+        self.max_parallel = max(1, int(max_parallel))
+        self.timeout = timeout
+        self.log = log
+        self.tuned_options = tuned_options or {}
+
+    def mount_options(self, username, nas_ip, share):
+        tuned = self.tuned_options.get(tuned_key(nas_ip, share), DEFAULT_TUNED_OPTIONS)
+        return f"{base_mount_options(username)},{tuned}"
+
+    def mount_one(self, nas_ip, share, mount_point, options, password):
+        start = time.monotonic()
+        try:
+            result = self.helper.call('mount', source=f"//{nas_ip}/{share}", target=mount_point,
+                                      options=options, password=password, timeout=self.timeout)
+            returncode, stderr = result.returncode, result.stderr
+        except (HelperError, Cancelled) as e:
+            returncode, stderr = 1, str(e)
+        duration = time.monotonic() - start
+        error = '' if returncode == 0 else (stderr.strip() or f"Exit-Code {returncode}")
+        return MountResult(share, mount_point, returncode == 0, duration, error)
+
+    @traced('mount')
+    def mount_all(self, nas_ip, shares, mount_base, username, password, on_result=None):
+        """on_result(MountResult) wird nach jedem Share aus dem aufrufenden Thread aufgerufen."""
+        mount_points = {share: os.path.join(mount_base, safe_share_name(share)) for share in shares}
+
+        # Alle Verzeichnisse mit einer einzigen Helfer-Operation anlegen
+        result = self.helper.call('mkdir', paths=[mount_base, *mount_points.values()])
+        if result.returncode != 0:
+            self.log(f"❌ Mount-Verzeichnisse konnten nicht angelegt werden: {result.stderr.strip()}")
+
+        results = []
+        with ThreadPoolExecutor(max_workers=min(self.max_parallel, len(shares) or 1)) as pool:
+            futures = [pool.submit(TRACER.bind(self.mount_one), nas_ip, share, mount_points[share],
+                                   self.mount_options(username, nas_ip, share), password)
+                       for share in shares]
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                if result.ok:
+                    self.log(f"✅ {result.share:<20} → {result.mount_point} ({result.duration:.1f}s)")
+                else:
+                    self.log(f"❌ {result.share:<20} → FEHLER: {result.error}")
+                if on_result:
+                    on_result(result)
+        return results
+
+    def log_summary(self, results, elapsed):
+        success_count = sum(1 for r in results if r.ok)
+        self.log(f"⏱️  Dauer pro Share (gesamt {elapsed:.1f}s, max. {self.max_parallel} parallel):")
+        for result in sorted(results, key=lambda r: r.duration, reverse=True):
+            status = "✅" if result.ok else "❌"
+            self.log(f"   {status} {result.share:<20} {result.duration:6.2f}s")
+        self.log(f"📊 {success_count}/{len(results)} Shares erfolgreich gemountet")
+
+
+def plan_reconcile(host, shares, mount_base, mounts):
+    """Vergleicht gewünschte Shares eines Hosts mit den CIFS-Mounts unter mount_base."""
+    def source_of(entry):
+        server, share = split_unc(entry.source) or ('', '')
+        return server.lower(), share.lower()
+
+    by_point = {os.path.normpath(entry.mount_point): entry for entry in mounts}
+    to_mount, to_remount, to_remount_points, unchanged = [], [], [], []
+    wanted_points = set()
+    for share in shares:
+        mount_point = os.path.normpath(os.path.join(mount_base, safe_share_name(share)))
+        wanted_points.add(mount_point)
+        entry = by_point.get(mount_point)
+        if entry is None:
+            to_mount.append(share)
+        elif source_of(entry) == (host.lower(), share.lower()):
+            unchanged.append(share)
+        else:
+            to_remount.append(share)
+            to_remount_points.append(entry.mount_point)
+    stale = [entry.mount_point for point, entry in by_point.items()
+             if point not in wanted_points and source_of(entry)[0] == host.lower()]
+    return ReconcilePlan(to_mount, to_remount, to_remount_points, stale, unchanged)
+
+
+_LATENCY_PROBE = ('import os, sys, time; start = time.monotonic(); os.statvfs(sys.argv[1]); '
+                  'print(time.monotonic() - start)')
+
+
+def probe_latency(path, timeout=DEFAULT_LIVENESS_TIMEOUT):
+    """Dauer eines statvfs (ein Roundtrip zum Server) in Sekunden, None wenn der Mount hängt oder fehlt.
+    Läuft in einem Kindprozess: hängt der Mount, blockiert nur das Kind."""
+    token = TRACER.begin('statvfs', ['statvfs', path], path)
+    process = subprocess.Popen([sys.executable, '-c', _LATENCY_PROBE, path],
+                               stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    try:
+        stdout, _ = process.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        # Ein Prozess im D-Zustand stirbt erst, wenn der Kernel aufgibt - nicht darauf warten
+        threading.Thread(target=process.wait, daemon=True).start()
+        TRACER.end(token, 124, f"Timeout nach {timeout} Sekunden")
+        return None
+    TRACER.end(token, process.returncode)
+    if process.returncode != 0:
+        return None
+    return float(stdout)
+
+
+def probe_alive(path, timeout=DEFAULT_LIVENESS_TIMEOUT):
+    return probe_latency(path, timeout) is not None
+
+
+def processes_holding(base, names=BLOCKING_PROCESS_NAMES):
+    """PIDs eigener Prozesse mit passendem Namen, die Dateien oder cwd unter base offen haben.
+    Liest nur /proc-Links und berührt dabei das (evtl. hängende) Dateisystem nicht."""
+    base = base.rstrip('/')
+    pids = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit() or int(entry) == os.getpid():
+            continue
+        try:
+            with open(f"/proc/{entry}/comm", 'r') as f:
+                if names and f.read().strip() not in names:
+                    continue
+            links = [os.path.join(f"/proc/{entry}/fd", fd) for fd in os.listdir(f"/proc/{entry}/fd")]
+            links.append(f"/proc/{entry}/cwd")
+            for link in links:
+                try:
+                    target = os.readlink(link)
+                except OSError:
+                    continue
+                if target == base or target.startswith(base + '/'):
+                    pids.append(int(entry))
+                    break
+        except OSError:
+            continue
+    return pids
+
+
+class UnmountEngine:
+    """Paralleles Unmounten; hängende Mounts werden erkannt und mit -f/-l ausgehängt."""
+
+    def __init__(self, helper, max_parallel=DEFAULT_MAX_PARALLEL, deadline=DEFAULT_UNMOUNT_DEADLINE,
+                 probe_timeout=DEFAULT_LIVENESS_TIMEOUT, log=print):
+        self.helper = helper
+        self.max_parallel = max(1, int(max_parallel))
+        self.deadline = deadline
+        self.probe_timeout = probe_timeout
+        self.log = log
+
+    def release_blockers(self, mount_base):
+        pids = processes_holding(mount_base)
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except OSError:
+                continue
+        if pids:
+            self.log(f"🔪 {len(pids)} Prozesse mit offenen Dateien unter {mount_base} beendet")
+        return pids
+
+    def unmount_one(self, mount_point):
+        start = time.monotonic()
+        hung = not probe_alive(mount_point, self.probe_timeout)
+        escalation = [['-f'], ['-l']] if hung else [[], ['-l']]
+        error = ''
+        for flags in escalation:
+            try:
+                result = self.helper.call('umount', target=mount_point, flags=flags, timeout=self.deadline)
+            except HelperError as e:
+                error = str(e)
+                break
+            except Cancelled as e:
+                error = str(e)
+                # Nur ein Abbruch durch den Benutzer beendet die Eskalation; eine Zeitüberschreitung
+                # (hängendes umount) soll gerade mit -l weitermachen
+                if self.helper.cancelled:
+                    break
+                continue
+            if result.returncode == 0:
+                method = ' '.join(['umount', *flags])
+                return UnmountResult(mount_point, True, time.monotonic() - start, method, hung, '')
+            error = result.stderr.strip() or f"Exit-Code {result.returncode}"
+        return UnmountResult(mount_point, False, time.monotonic() - start, None, hung, error)
+
+    @traced('unmount')
+    def unmount_all(self, mount_points):
+        results = []
+        # Tiefere Mount-Punkte zuerst einreichen, damit verschachtelte Mounts nicht blockieren
+        ordered = sorted(mount_points, key=len, reverse=True)
+        with ThreadPoolExecutor(max_workers=min(self.max_parallel, len(ordered) or 1)) as pool:
+            futures = [pool.submit(TRACER.bind(self.unmount_one), mount_point) for mount_point in ordered]
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                hung = " ⚠️ hing" if result.hung else ""
+                if result.ok:
+                    self.log(f"✅ {result.mount_point} ({result.method}, {result.duration:.1f}s){hung}")
+                else:
+                    self.log(f"❌ {result.mount_point} → FEHLER: {result.error}{hung}")
+        return results
+
+    def log_summary(self, results, elapsed):
+        unmounted = sum(1 for r in results if r.ok)
+        hung = sum(1 for r in results if r.hung)
+        if hung:
+            self.log(f"⚠️  {hung} hängende Mounts erkannt")
+        self.log(f"📊 {unmounted}/{len(results)} Shares unmounted ({elapsed:.1f}s)")
+
+
+class NASMountCore:
+    """Alle Abläufe (Scan, Mount, Unmount, Status, Permanent-Mount) ohne GUI-Abhängigkeit."""
+
+    def __init__(self, config=None, helper=None, log=print,
+                 cred_file=CRED_FILE, share_cache_file=SHARE_CACHE_FILE, fstab_path='/etc/fstab',
+                 mountinfo_path=MOUNTINFO, unit_dir=nas_mount_units.UNIT_DIR,
+                 preflight_cache_file=PREFLIGHT_CACHE_FILE):
+        self.config = {**DEFAULT_CONFIG, **(config or {})}
+        self.helper = helper or PrivilegedHelper(workers=max(1, int(self.config['max_total_parallel'])))
+        self.log = log
+        self.cred_file = Path(cred_file)
+        self.fstab_path = fstab_path
+        self.mountinfo_path = mountinfo_path
+        self.unit_dir = unit_dir
+        self.commands = CommandEngine(self.helper)
+        self.discovery = ShareDiscovery(share_cache_file, ttl=self.config['discovery_ttl'], engine=self.commands)
+        # Bereich → (Zeitpunkt, gefundene Hosts); die Shares liegen im Cache der Discovery
+        self.sweep_results = {}
+        self.preflight = Preflight(preflight_cache_file)
+        self.configure()
+
+    def configure(self):
+        """Übernimmt Limits und Timeouts aus der Konfiguration, z.B. nach Änderungen in der GUI."""
+        # Nicht mehr Operationen gleichzeitig als der Helfer Threads hat: Wartezeit in seinem Pool
+        # würde sonst gegen das Timeout zählen und gesunde Mounts mit -l aushängen
+        self.commands.max_total = min(max(1, int(self.config['max_total_parallel'])), self.helper.workers)
+        self.commands.max_per_host = self.max_parallel
+        self.commands.timeouts.update({'probe': DEFAULT_PROBE_TIMEOUT, 'enumerate': DEFAULT_SCAN_TIMEOUT,
+                                       'mount': self.config['mount_timeout'],
+                                       'unmount': self.config['unmount_deadline']})
+        self.discovery.ttl = self.config['discovery_ttl']
+        try:
+            self.discovery.share_filter = ShareFilter(self.config['share_include'], self.config['share_exclude'])
+        except ValueError as e:
+            # Ein leerer Filter würde beim Abgleich alle Mounts als veraltet aushängen
+            self.log(f"❌ Share-Filter ungültig, der bisherige Filter bleibt aktiv: {e}")
+
+    def cancel(self):
+        """Bricht laufende Befehle ab; alle weiteren schlagen bis reset() mit Cancelled fehl."""
+        self.log("⏹️  Breche laufende Operationen ab...")
+        self.commands.cancel()
+
+    def reset(self):
+        self.commands.reset()
+
+    def close(self):
+        self.commands.close()
+        self.helper.close()
+
+    @property
+    def max_parallel(self):
+        try:
+            return max(1, int(self.config['max_parallel']))
+        except (TypeError, ValueError):
+            return DEFAULT_MAX_PARALLEL
+
+    @traced('preflight')
+    def check_environment(self, refresh=False):
+        """Liefert (checks, fehlende Pakete). Gecacht, solange sich Programme, Kernel und Gruppen nicht ändern."""
+        checks, cached = self.preflight.run(refresh=refresh)
+        if not cached:
+            self.log(f"🩺 Umgebung geprüft: {sum(1 for check in checks if check.ok)}/{len(checks)} in Ordnung")
+        for check in checks:
+            if not check.ok:
+                self.log(f"⚠️  {check.name}: {check.detail}")
+        return checks, missing_packages(checks)
+
+    @traced('preflight')
+    def install_packages(self, packages):
+        manager = package_manager()
+        if not manager:
+            self.log("❌ Kein unterstützter Paketmanager gefunden")
+            return False
+        self.log(f"📦 Installiere {', '.join(packages)} ({manager})...")
+        result = self.commands.call('install_packages', manager=manager, packages=list(packages))
+        self.preflight.invalidate()
+        if result.returncode != 0:
+            self.log(f"❌ Installation fehlgeschlagen: {result.stderr.strip()}")
+            return False
+        self.log("✅ Pakete installiert")
+        return True
+
+    @traced('scan')
+    def discover(self, host, username='', password='', refresh=False):
+        self.discovery.ttl = self.config['discovery_ttl']
+        cached = not refresh and self.discovery.cached(host, username) is not None
+        shares = self.discovery.get_shares(host, username, password, refresh=refresh)
+        if cached:
+            self.log(f"⚡ {len(shares)} Shares von {host} aus dem Cache (max. {self.discovery.ttl}s alt)")
+        return shares
+
+    @traced('scan')
+    def sweep(self, spec, username='', password='', refresh=False):
+        self.log(f"📡 Durchsuche {spec} nach SMB-Hosts...")
+        sweep = SubnetSweep(self.discovery, timeout=self.commands.timeouts['probe'], max_parallel=self.max_parallel,
+                            log=self.log, engine=self.commands)
+        hosts = sweep.run(spec, username, password, refresh=refresh)
+        self.sweep_results[spec] = (time.monotonic(), list(hosts))
+        total = sum(len(shares) for shares in hosts.values())
+        self.log(f"📊 {total} Shares auf {len(hosts)} Hosts")
+        return hosts
+
+    def scan(self, spec, username='', password='', refresh=True):
+        """Liefert {host: [Share, ...]} für eine einzelne IP oder einen Bereich."""
+        if is_host_range(spec):
+            return self.sweep(spec, username, password, refresh=refresh)
+        self.log(f"🔍 Scanne Shares auf {spec}...")
+        return {spec: self.discover(spec, username, password, refresh=refresh)}
+
+    def mount_targets(self, spec, username, password, mount_base):
+        """[(host, shares, base)]; bei einem Bereich landet jeder Host unter mount_base/<ip>."""
+        if is_host_range(spec):
+            stamp, found = self.sweep_results.get(spec, (None, None))
+            if found is None or time.monotonic() - stamp >= self.config['discovery_ttl']:
+                hosts = self.sweep(spec, username, password)
+            else:
+                # Host-Liste aus dem letzten Sweep, die Shares aber über den Cache mit TTL
+                hosts = {}
+                for host in found:
+                    try:
+                        hosts[host] = self.discover(host, username, password)
+                    except DiscoveryError as e:
+                        self.log(f"❌ {host:<15} → {e}")
+            return [(host, shares, os.path.join(mount_base, host)) for host, shares in hosts.items()]
+        return [(spec, self.discover(spec, username, password), mount_base)]
+
+    def mount(self, spec, username, password, mount_base):
+        """Mountet nur die Shares, die noch nicht gemountet sind. Liefert {host: [MountResult]}."""
+        return {host: result['mounted']
+                for host, result in self.reconcile(spec, username, password, mount_base, prune=False).items()}
+
+    @traced('reconcile')
+    def reconcile(self, spec, username, password, mount_base, prune=True):
+        """Gleicht gewünschte Shares mit den tatsächlichen CIFS-Mounts ab und führt nur die Differenz aus.
+        Mit prune werden Mounts von Shares, die es auf dem Host nicht mehr gibt, ausgehängt."""
+        start = time.monotonic()
+        targets = self.mount_targets(spec, username, password, mount_base)
+        results = {host: self.reconcile_host(host, [share.name for share in shares], base, username, password,
+                                             prune=prune)
+                   for host, shares, base in targets}
+        self.log(f"✅ Abgleich fertig ({(time.monotonic() - start) * 1000:.0f} ms)")
+        return results
+
+    def reconcile_host(self, host, shares, base, username, password, prune=True, on_result=None):
+        """Abgleich für einen Host und eine Liste von Share-Namen; gemountet wird mit dem Host-Limit der Engine."""
+        plan = plan_reconcile(host, shares, base, MountTable.read(self.mountinfo_path).under(base))
+        if prune and not shares and plan.stale:
+            # Eine leere Liste heißt eher "Scan oder Filter kaputt" als "alles aushängen"
+            self.log(f"⚠️  {host}: Keine Shares gewählt – {len(plan.stale)} veraltete Mounts werden nicht ausgehängt")
+            prune = False
+        to_unmount = plan.to_remount_points + (plan.stale if prune else [])
+        to_mount = plan.to_mount + plan.to_remount
+        self.log(f"🔄 {host}: {len(plan.unchanged)} aktuell, {len(plan.to_mount)} fehlen, "
+                 f"{len(plan.to_remount)} neu zu mounten, {len(plan.stale)} veraltet")
+
+        unmounted = []
+        if to_unmount:
+            unmounted = self.unmount_engine().unmount_all(to_unmount)
+        mounted = []
+        if to_mount:
+            engine = MountEngine(self.commands, max_parallel=self.commands.host_limit(host),
+                                 timeout=self.config['mount_timeout'], log=self.log,
+                                 tuned_options=self.config['tuned_options'])
+            self.log(f"🚀 {host}: Mounte {len(to_mount)} Shares ({engine.max_parallel} parallel)...")
+            mount_start = time.monotonic()
+            mounted = engine.mount_all(host, to_mount, base, username, password, on_result=on_result)
+            engine.log_summary(mounted, time.monotonic() - mount_start)
+        elif not shares:
+            self.log(f"❌ {host}: Keine Shares gefunden!")
+        warmed = []
+        if self.config['warmup'] and any(result.ok for result in mounted):
+            warmed = self.warm_up([result.mount_point for result in mounted if result.ok])
+        return {'mounted': mounted, 'unmounted': unmounted, 'unchanged': plan.unchanged, 'warmed': warmed}
+
+    @traced('warmup')
+    def warm_up(self, mount_points):
+        """Liest die Verzeichnisbäume frisch gemounteter Shares an (siehe nas_mount_warmup)."""
+        warmer = MetadataWarmer(depth=self.config['warmup_depth'], max_entries=self.config['warmup_max_entries'],
+                                workers=self.config['warmup_workers'], log=self.log,
+                                should_stop=lambda: self.commands.cancelled)
+        self.log(f"🔥 Lade Metadaten von {len(mount_points)} Shares vor (Tiefe {warmer.depth}, "
+                 f"max. {warmer.max_entries} Einträge pro Share)...")
+        start = time.monotonic()
+        stats = warmer.warm_all(mount_points)
+        self.log(f"🔥 {sum(s.entries for s in stats)} Einträge vorgeladen ({time.monotonic() - start:.1f}s)")
+        return stats
+
+    def unmount_engine(self):
+        return UnmountEngine(self.commands, max_parallel=self.max_parallel,
+                             deadline=self.config['unmount_deadline'], log=self.log)
+
+    @traced('tune')
+    def tune(self, host, username, password, mount_base, shares=None):
+        """Ermittelt pro Share den schnellsten Optionssatz und speichert ihn in config['tuned_options'].
+        Die Shares werden nacheinander gemessen, damit sich die Messungen nicht gegenseitig bremsen."""
+        names = shares or [share.name for share in self.discover(host, username, password)]
+        tuner = MountTuner(self.commands, base_mount_options(username), os.path.join(mount_base, '.nas_mount_tune'),
+                           size_mb=self.config['tune_size_mb'], timeout=self.config['mount_timeout'],
+                           log=self.log)
+        tuned = {}
+        for share in names:
+            self.log(f"🏎️  Optimiere {share}...")
+            best, _ = tuner.tune(host, share, password)
+            if best is None:
+                self.log(f"❌ {share}: Kein Optionssatz ließ sich mounten")
+                continue
+            key = tuned_key(host, share)
+            self.config['tuned_options'] = {**self.config['tuned_options'], key: best}
+            tuned[share] = best
+            self.log(f"✅ {share}: {best}")
+        return tuned
+
+    def mounted(self, mount_base):
+        return MountTable.read(self.mountinfo_path).under(mount_base)
+
+    @traced('remount')
+    def remount(self, entry, username, password):
+        """Hängt einen (hängenden) Mount aus und mountet denselben Share wieder an derselben Stelle.
+        Ist der Mount schon weg (z.B. nach einem fehlgeschlagenen Versuch), wird nur gemountet."""
+        host, share = split_unc(entry.source)
+        unmount_time = 0.0
+        if MountTable.read(self.mountinfo_path).is_mounted(entry.mount_point):
+            unmounted = self.unmount_engine().unmount_one(entry.mount_point)
+            if not unmounted.ok:
+                return MountResult(share, entry.mount_point, False, unmounted.duration, unmounted.error)
+            unmount_time = unmounted.duration
+        engine = MountEngine(self.commands, timeout=self.config['mount_timeout'], log=self.log,
+                             tuned_options=self.config['tuned_options'])
+        result = engine.mount_one(host, share, entry.mount_point,
+                                  engine.mount_options(username, host, share), password)
+        return result._replace(duration=result.duration + unmount_time)
+
+    def unmount(self, mount_base):
+        mount_points = [entry.mount_point for entry in self.mounted(mount_base)]
+        if not mount_points:
+            self.log("📭 Keine Mounts gefunden")
+            return []
+        engine = self.unmount_engine()
+        self.log(f"🔽 Unmounte {len(mount_points)} Shares ({engine.max_parallel} parallel)...")
+        engine.release_blockers(mount_base)
+        start = time.monotonic()
+        results = engine.unmount_all(mount_points)
+        engine.log_summary(results, time.monotonic() - start)
+        return results
+
+    def fstab_manager(self):
+        return FstabManager(self.commands, self.fstab_path, backups=self.config['fstab_backups'])
+
+    def fstab_has_block(self):
+        try:
+            return self.fstab_manager().read().has_block
+        except OSError:
+            return None
+
+    def write_fstab(self, entries):
+        """Schreibt den NAS-Block nur bei Änderungen. Liefert den FstabDiff, None bei einem Fehler."""
+        manager = self.fstab_manager()
+        try:
+            result, diff = manager.apply(entries)
+        except OSError as e:
+            self.log(f"❌ fstab nicht lesbar: {e}")
+            return None
+        if result is None:
+            self.log(f"✅ fstab unverändert ({len(diff.unchanged)} Einträge aktuell)")
+            return diff
+        if result.returncode != 0:
+            self.log(f"❌ Fehler beim Schreiben von fstab: {result.stderr.strip()}")
+            return None
+        self.log(f"💾 fstab Backup erstellt (die letzten {manager.backups} werden behalten)")
+        self.log(f"✅ fstab aktualisiert: {len(diff.added)} neu, {len(diff.changed)} geändert, "
+                 f"{len(diff.removed)} entfernt, {len(diff.unchanged)} unverändert")
+        return diff
+
+    def apply_fstab_diff(self, diff):
+        """Bindet nur die geänderten Einträge neu ein, statt 'mount -a' über die ganze fstab laufen zu lassen."""
+        if not has_changes(diff):
+            return
+        old = diff.removed + [entry for entry, _ in diff.changed]
+        new = diff.added + [entry for _, entry in diff.changed]
+        systemd = check_systemd().ok
+
+        def automounts(entries):
+            # Vom systemd-fstab-generator erzeugte Units für x-systemd.automount
+            return [f"{nas_mount_units.escape_path(entry.mount_point)}.automount" for entry in entries]
+
+        def warn(op, result):
+            if result.returncode != 0:
+                self.log(f"⚠️  {op} fehlgeschlagen: {result.stderr.strip() or result.returncode}")
+
+        if systemd and old:
+            warn('systemctl stop', self.commands.call('systemctl', args=['stop', *automounts(old)], timeout=120))
+        table = MountTable.read(self.mountinfo_path)
+        mounted = [entry.mount_point for entry in old if table.is_mounted(entry.mount_point)]
+        if mounted:
+            self.unmount_engine().unmount_all(mounted)
+        if systemd:
+            warn('systemctl daemon-reload', self.commands.call('systemctl', args=['daemon-reload']))
+            if new:
+                warn('systemctl start', self.commands.call('systemctl', args=['start', *automounts(new)],
+                                                           timeout=120))
+        else:
+            for entry, result in zip(new, self.commands.run_batch(
+                    [('mount_fstab', {'target': entry.mount_point}) for entry in new])):
+                warn(f"mount {entry.mount_point}", result)
+        self.log(f"🔁 fstab-Änderungen angewendet: {len(mounted)} ausgehängt, {len(new)} neu eingebunden")
+
+    def permanent_enabled(self):
+        """'systemd' oder 'fstab' wenn aktiv, False wenn nicht, None wenn fstab nicht lesbar ist."""
+        if nas_mount_units.installed_units(self.unit_dir):
+            return 'systemd'
+        in_fstab = self.fstab_has_block()
+        if in_fstab is None:
+            return None
+        return 'fstab' if in_fstab else False
+
+    def write_credentials(self, username, password, path=None):
+        path = path or self.cred_file
+        with open(path, 'w') as f:
+            f.write(f"username={username}\n")
+            f.write(f"password={password}\n")
+        os.chmod(path, 0o600)
+
+    def permanent_options(self, host, share):
+        tuned = self.config['tuned_options'].get(tuned_key(host, share), DEFAULT_TUNED_OPTIONS)
+        return (f"credentials={self.cred_file},uid={os.getuid()},gid={os.getgid()},"
+                f"file_mode=0777,dir_mode=0777,{tuned},_netdev")
+
+    def permanent_backend(self):
+        """Das konfigurierte Backend; ohne laufendes systemd bleibt nur fstab."""
+        backend = self.config['permanent_backend']
+        if backend == 'systemd' and not check_systemd().ok:
+            self.log("⚠️  systemd ist nicht aktiv – Permanent-Mount wird über fstab eingerichtet")
+            return 'fstab'
+        return backend
+
+    @traced('permanent')
+    def enable_permanent(self, host, username, password, mount_base):
+        backend = self.permanent_backend()
+        self.log(f"🔧 Richte Permanent-Mount ein ({backend})...")
+        self.log("📝 Erstelle Credentials-Datei...")
+        self.write_credentials(username, password)
+        self.log("✅ Credentials gesichert")
+
+        shares = [share.name for share in self.discover(host, username, password)]
+        if not shares:
+            self.log("❌ Keine Shares gefunden!")
+            return False
+        self.log(f"📋 Gefunden: {len(shares)} Shares")
+
+        if backend == 'fstab':
+            ok = self.enable_fstab(host, shares, mount_base)
+        else:
+            ok = self.enable_systemd(host, shares, mount_base)
+        if ok:
+            self.log("✅ Permanent-Mount aktiviert!")
+            self.log(f"💡 {len(shares)} Shares dauerhaft eingebunden (überlebt Reboot)")
+        return ok
+
+    def enable_systemd(self, host, shares, mount_base):
+        if self.fstab_has_block():
+            diff = self.write_fstab([])
+            if diff is None:
+                self.log("❌ Alter fstab-Block konnte nicht entfernt werden")
+                return False
+            self.apply_fstab_diff(diff)
+            self.log("🔀 Alten fstab-Block entfernt (Migration zu systemd-Units)")
+
+        pairs = [nas_mount_units.build_units(host, share, f"{mount_base}/{safe_share_name(share)}",
+                                             self.permanent_options(host, share),
+                                             idle_timeout=self.config['automount_idle'],
+                                             mount_timeout=self.config['mount_timeout'])
+                 for share in shares]
+        result = nas_mount_units.install_units(self.commands, pairs, self.unit_dir, log=self.log)
+        if result.returncode != 0:
+            self.log(f"❌ Fehler beim Einrichten der systemd-Units: {result.stderr.strip()}")
+            return False
+        self.log(f"✅ {len(pairs)} .mount/.automount-Paare aktiviert (Verbindung beim ersten Zugriff)")
+        return True
+
+    def enable_fstab(self, host, shares, mount_base):
+        units = nas_mount_units.installed_units(self.unit_dir)
+        if units:
+            nas_mount_units.remove_units(self.commands, units, self.unit_dir)
+            self.log(f"🧹 {len(units)} systemd-Units entfernt")
+
+        result = self.commands.call('mkdir', paths=[f"{mount_base}/{safe_share_name(share)}" for share in shares])
+        if result.returncode != 0:
+            self.log(f"❌ Mount-Verzeichnisse konnten nicht angelegt werden: {result.stderr.strip()}")
+            return False
+
+        entries = [FstabEntry(f"//{host}/{share}", f"{mount_base}/{safe_share_name(share)}", 'cifs',
+                              f"{self.permanent_options(host, share)},x-systemd.automount", '0', '0')
+                   for share in shares]
+        diff = self.write_fstab(entries)
+        if diff is None:
+            return False
+        self.apply_fstab_diff(diff)
+        return True
+
+    @traced('permanent')
+    def disable_permanent(self, mount_base):
+        self.log("🔧 Deaktiviere Permanent-Mount...")
+        units = nas_mount_units.installed_units(self.unit_dir)
+        if units:
+            result = nas_mount_units.remove_units(self.commands, units, self.unit_dir)
+            if result.returncode != 0:
+                self.log(f"❌ Fehler: {result.stderr.strip()}")
+                return False
+            self.log(f"✅ {len(units)} systemd-Units entfernt")
+        if self.fstab_has_block():
+            diff = self.write_fstab([])
+            if diff is None:
+                return False
+            self.apply_fstab_diff(diff)
+        self.unmount(mount_base)
+        self.log("✅ Permanent-Mount deaktiviert")
+        return True
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+NAS Mount Manager - Befehls-Engine
+Ein asyncio-Loop in einem eigenen Thread führt alle externen Befehle aus:
+smbclient direkt per create_subprocess_exec, Mount, Unmount und
+Dateioperationen über den privilegierten Helfer, der Netzwerk-Scan als
+Koroutine. Jede Operationsart hat ihr eigenes Timeout, gleichzeitige
+Befehle sind pro Host und insgesamt begrenzt, und cancel() beendet alles,
+was gerade läuft. call/submit/run_batch verhalten sich wie bei
+PrivilegedHelper, Aufrufer in Worker-Threads blockieren wie bisher.
+"""
+
+import os
+import signal
+import threading
+from concurrent.futures import CancelledError, Future
+
+from nas_mount_trace import TRACER
+
+DEFAULT_MAX_TOTAL = 32
+DEFAULT_MAX_PER_HOST = 8
+OPERATION_TIMEOUTS = {'probe': 0.5, 'enumerate': 30, 'mount': 30, 'unmount': 10, 'install': 900, 'helper': 120}
+HELPER_OPERATION_TYPES = {'mount': 'mount', 'mount_fstab': 'mount', 'umount': 'unmount',
+                          'install_packages': 'install'}
+# Zusätzliche Wartezeit auf die Antwort des Helfers, der das Timeout selbst durchsetzt
+HELPER_GRACE = 5
+
+
+class Cancelled(Exception):
+    pass
+
+
+def _host_of(params):
+    source = params.get('source') or ''
+    return source[2:].split('/', 1)[0] if source.startswith('//') else ''
+
+
+def _kill(process):
+    # Ganze Prozessgruppe, sonst halten Kindprozesse die Pipes offen
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except OSError:
+        process.kill()
+
+
+class CommandEngine:
+    def __init__(self, helper, max_total=DEFAULT_MAX_TOTAL, max_per_host=DEFAULT_MAX_PER_HOST, timeouts=None):
+        self.helper = helper
+        self.max_total = max_total
+        self.max_per_host = max_per_host
+        self.timeouts = {**OPERATION_TIMEOUTS, **(timeouts or {})}
+        # Abweichende Limits einzelner Hosts (z.B. aus Flotten-Profilen)
+        self.host_limits = {}
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._futures = set()
+        self._cancelled = threading.Event()
+        # (Limit, Semaphore) pro Host bzw. global; nur im Loop-Thread benutzt
+        self._limits = {}
+
+    def start(self):
+        # asyncio erst bei der ersten Operation laden, das hält den CLI-Start schlank
+        import asyncio
+        with self._lock:
+            if not self._loop:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+                self._thread.start()
+            return self._loop
+
+    def close(self):
+        self.cancel()
+        with self._lock:
+            loop, thread, self._loop, self._thread = self._loop, self._thread, None, None
+        if loop:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout=5)
+            if not thread.is_alive():
+                loop.close()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        """Bricht alle laufenden und wartenden Operationen ab; neue werden bis reset() abgelehnt."""
+        self._cancelled.set()
+        with self._lock:
+            futures = list(self._futures)
+        for future in futures:
+            future.cancel()
+
+    def reset(self):
+        self._cancelled.clear()
+
+    def _semaphore(self, key, limit):
+        import asyncio
+        current, semaphore = self._limits.get(key, (None, None))
+        if current != limit:
+            # Geändertes Limit: neue Semaphore, laufende Operationen geben die alte frei
+            semaphore = asyncio.Semaphore(limit)
+            self._limits[key] = (limit, semaphore)
+        return semaphore
+
+    def host_limit(self, host):
+        return max(1, int(self.host_limits.get(host, self.max_per_host)))
+
+    async def _limited(self, host, factory):
+        # Der Netzwerk-Scan (host None) begrenzt sich selbst
+        if host is None:
+            return await factory()
+        total = self._semaphore('total', max(1, int(self.max_total)))
+        # Lokale Operationen (host '') zählen nur global
+        if not host:
+            async with total:
+                return await factory()
+        # Erst den Platz beim Host, dann den globalen: wer auf einen langsamen Host wartet,
+        # belegt keinen globalen Platz und bremst die übrigen Hosts nicht
+        async with self._semaphore(('host', host), self.host_limit(host)):
+            async with total:
+                return await factory()
+
+    def _schedule(self, factory, host, cleanup=False):
+        import asyncio
+        if cleanup:
+            # Aufräumen (umount, rmdir) muss auch nach cancel() noch laufen und wird nicht mit abgebrochen
+            return asyncio.run_coroutine_threadsafe(self._limited(host, factory), self.start())
+        if self._cancelled.is_set():
+            future = Future()
+            future.cancel()
+            return future
+        future = asyncio.run_coroutine_threadsafe(self._limited(host, factory), self.start())
+        with self._lock:
+            self._futures.add(future)
+        future.add_done_callback(self._forget)
+        if self._cancelled.is_set():
+            future.cancel()
+        return future
+
+    def _forget(self, future):
+        with self._lock:
+            self._futures.discard(future)
+
+    @staticmethod
+    def _result(future):
+        try:
+            return future.result()
+        except CancelledError:
+            raise Cancelled("Abgebrochen")
+
+    async def _exec(self, name, args, env, timeout, share, phase):
+        import asyncio
+        with TRACER.phase(phase):
+            token = TRACER.begin(name, args, share)
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *args, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+                env=None if env is None else {**os.environ, **env}, start_new_session=True)
+        except OSError as e:
+            TRACER.end(token, 127, str(e))
+            return 127, "", str(e)
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+        except asyncio.TimeoutError:
+            _kill(process)
+            TRACER.end(token, 124, f"Timeout nach {timeout} Sekunden")
+            return 124, "", f"Timeout nach {timeout} Sekunden"
+        except asyncio.CancelledError:
+            _kill(process)
+            TRACER.end(token, 130, "Abgebrochen")
+            raise
+        stdout, stderr = stdout.decode(errors='replace'), stderr.decode(errors='replace')
+        TRACER.end(token, process.returncode, stderr)
+        return process.returncode, stdout, stderr
+
+    def run(self, args, op, host='', env=None, timeout=None, share=''):
+        """Wie run_command, aber begrenzt, mit dem Timeout der Operationsart und abbrechbar."""
+        timeout = timeout or self.timeouts[op]
+        phase = TRACER.current_phase()
+        future = self._schedule(lambda: self._exec(os.path.basename(args[0]), args, env, timeout,
+                                                   share or host, phase), host)
+        return self._result(future)
+
+    def run_coroutine(self, factory):
+        """Führt factory() im Loop aus, ohne Host-Limit (z.B. den Netzwerk-Scan mit eigener Begrenzung)."""
+        return self._result(self._schedule(factory, None))
+
+    async def _helper_op(self, op, params, phase):
+        import asyncio
+        with TRACER.phase(phase):
+            future = self.helper.submit(op, **params)
+        waiter = asyncio.wrap_future(future)
+        try:
+            return await asyncio.wait_for(asyncio.shield(waiter), params['timeout'] + HELPER_GRACE)
+        except asyncio.TimeoutError:
+            self.helper.cancel([future])
+            try:
+                # Wieder abgeschirmt: wait_for darf das Future des Helfers nicht abbrechen,
+                # sonst scheitert die verspätete Antwort im Lese-Thread
+                return await asyncio.wait_for(asyncio.shield(waiter), HELPER_GRACE)
+            except asyncio.TimeoutError:
+                raise Cancelled(f"Keine Antwort vom Helfer nach {params['timeout']}s")
+        except asyncio.CancelledError:
+            self.helper.cancel([future])
+            raise
+
+    def submit(self, op, cleanup=False, **params):
+        params.setdefault('timeout', self.timeouts[HELPER_OPERATION_TYPES.get(op, 'helper')])
+        host = params.pop('host', '') or _host_of(params)
+        # Einen evtl. nötigen sudo-Prompt im aufrufenden Thread erledigen, nicht im Loop
+        self.helper.start()
+        phase = TRACER.current_phase()
+        return self._schedule(lambda: self._helper_op(op, params, phase), host, cleanup)
+
+    def call(self, op, cleanup=False, **params):
+        """cleanup=True: läuft auch nach cancel(), z.B. das umount nach einem abgebrochenen Vorgang."""
+        return self._result(self.submit(op, cleanup, **params))
+
+    def run_batch(self, operations):
+        futures = [self.submit(op, **params) for op, params in operations]
+        return [self._result(future) for future in futures]
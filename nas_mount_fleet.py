@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+NAS Mount Manager - Flotte
+Mehrere NAS-Profile in einer Konfiguration: jedes Profil hat seinen Host
+(oder Bereich), eine eigene Credentials-Datei, ein eigenes Mount-Verzeichnis,
+Include/Exclude-Filter für Share-Namen, eine Priorität und optional ein
+eigenes Limit paralleler Mounts pro Host. FleetMounter gleicht alle Profile
+gleichzeitig ab und meldet den Fortschritt über alle Profile zusammen.
+
+Beispiel in ~/.nas_mount_config.json:
+  "profiles": [
+    {"name": "buero", "host": "192.168.0.11", "credentials_file": "~/.smbcredentials-buero",
+     "mount_base": "/mnt/buero", "exclude": ["IPC$", "print$"], "priority": 10},
+    {"name": "archiv", "host": "192.168.0.20", "mount_base": "/mnt/archiv",
+     "include": ["Foto*", "Video*"], "max_parallel": 2}
+  ]
+"""
+
+import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from nas_mount_core import (Cancelled, DiscoveryError, HelperError, CRED_FILE, ShareFilter, is_host_range,
+                            read_credentials, safe_share_name)
+from nas_mount_trace import TRACER, traced
+
+Profile = namedtuple('Profile', 'name host username credentials_file mount_base include exclude priority max_parallel')
+FleetStatus = namedtuple('FleetStatus', 'profiles_done profiles_total shares_done shares_total failed')
+
+
+class ProfileError(ValueError):
+    pass
+
+
+def profile_from_dict(data, config):
+    """Fehlende Felder kommen aus der globalen Konfiguration; nur 'host' ist Pflicht."""
+    host = (data.get('host') or '').strip()
+    if not host:
+        raise ProfileError(f"Profil ohne host: {data}")
+    name = data.get('name') or host
+    max_parallel = data.get('max_parallel')
+    try:
+        ShareFilter(data.get('include') or [], data.get('exclude') or [])
+    except ValueError as e:
+        raise ProfileError(f"Profil {name}: {e}")
+    return Profile(
+        name=name,
+        host=host,
+        username=data.get('username', ''),
+        credentials_file=os.path.expanduser(data.get('credentials_file') or str(CRED_FILE)),
+        mount_base=data.get('mount_base') or os.path.join(config['mount_path'], safe_share_name(name)),
+        include=list(data.get('include') or []),
+        exclude=list(data.get('exclude') or []),
+        priority=int(data.get('priority', 0)),
+        max_parallel=max(1, int(max_parallel)) if max_parallel else None,
+    )
+
+
+def load_profiles(config, names=None):
+    """Profile nach Priorität (höchste zuerst). Ohne 'profiles' gilt die bisherige Einzel-Konfiguration."""
+    entries = config.get('profiles') or [{'name': config['nas_ip'], 'host': config['nas_ip'],
+                                          'username': config.get('username', ''),
+                                          'mount_base': config['mount_path']}]
+    profiles = [profile_from_dict(entry, config) for entry in entries]
+    seen = set()
+    for profile in profiles:
+        if profile.name in seen:
+            raise ProfileError(f"Profilname doppelt: {profile.name}")
+        seen.add(profile.name)
+    if names:
+        unknown = set(names) - seen
+        if unknown:
+            raise ProfileError(f"Unbekannte Profile: {', '.join(sorted(unknown))}")
+        profiles = [profile for profile in profiles if profile.name in names]
+    return sorted(profiles, key=lambda profile: (-profile.priority, profile.name))
+
+
+def save_profile(config, profile):
+    """Legt ein Profil an oder ersetzt das gleichnamige; liefert die neue Profilliste."""
+    entry = {key: value for key, value in profile._asdict().items() if value not in (None, [], '')}
+    profiles = [item for item in config.get('profiles') or [] if (item.get('name') or item.get('host')) != profile.name]
+    config['profiles'] = profiles + [entry]
+    return config['profiles']
+
+
+def credentials_path(name):
+    return Path.home() / f".smbcredentials-{safe_share_name(name)}"
+
+
+def filter_shares(names, include=(), exclude=()):
+    """Muster wie bei ShareFilter (Glob oder 're:<regex>'); gilt zusätzlich zum globalen Filter."""
+    share_filter = ShareFilter(include, exclude)
+    return [name for name in names if share_filter.matches(name)]
+
+
+def profile_credentials(profile):
+    username, password = read_credentials(profile.credentials_file)
+    return profile.username or username, password
+
+
+class FleetProgress:
+    """Zählt Shares über alle Profile; Callbacks kommen aus den Worker-Threads."""
+
+    def __init__(self, profiles, on_progress=None):
+        self._lock = threading.Lock()
+        self.on_progress = on_progress
+        # Name → [Shares gesamt, erledigt, fehlgeschlagen, fertig]
+        self.profiles = {profile.name: [0, 0, 0, False] for profile in profiles}
+
+    def _changed(self):
+        if self.on_progress:
+            self.on_progress(self.status())
+
+    def planned(self, name, count):
+        with self._lock:
+            self.profiles[name][0] += count
+        self._changed()
+
+    def mounted(self, name, result):
+        with self._lock:
+            counts = self.profiles[name]
+            counts[1] += 1
+            counts[2] += not result.ok
+        self._changed()
+
+    def finished(self, name, failed=False):
+        with self._lock:
+            counts = self.profiles[name]
+            # Aktuelle und nicht mehr versuchte Shares zählen als erledigt
+            counts[1] = counts[0]
+            counts[2] += failed
+            counts[3] = True
+        self._changed()
+
+    def status(self):
+        with self._lock:
+            counts = list(self.profiles.values())
+        return FleetStatus(sum(1 for c in counts if c[3]), len(counts), sum(c[1] for c in counts),
+                           sum(c[0] for c in counts), sum(c[2] for c in counts))
+
+
+def format_status(status):
+    text = (f"🚢 Profile {status.profiles_done}/{status.profiles_total}, "
+            f"Shares {status.shares_done}/{status.shares_total}")
+    return text + (f", {status.failed} Fehler" if status.failed else "")
+
+
+class FleetMounter:
+    """Gleicht alle Profile parallel ab (höchste Priorität zuerst). Das Limit pro Host gilt über
+    Profile hinweg, weil alle Mounts durch die gemeinsame CommandEngine des Kerns laufen."""
+
+    def __init__(self, core, max_profiles=None, log=print, on_progress=None):
+        self.core = core
+        self.max_profiles = max(1, int(max_profiles or core.config['fleet_parallel_profiles']))
+        self.log = log
+        self.on_progress = on_progress
+
+    @traced('fleet')
+    def run(self, profiles):
+        """Liefert {Profilname: {host: Abgleich-Ergebnis} oder {'error': ...}}."""
+        start = time.monotonic()
+        progress = FleetProgress(profiles, self.on_progress)
+        limits = self.core.commands.host_limits
+        saved = dict(limits)
+        for profile in profiles:
+            # Teilen sich Profile einen Host, gilt das kleinste Limit
+            if profile.max_parallel and not is_host_range(profile.host):
+                limits[profile.host] = min(limits.get(profile.host, profile.max_parallel), profile.max_parallel)
+        self.log(f"🚢 Mounte {len(profiles)} Profile ({self.max_profiles} gleichzeitig)...")
+        try:
+            with ThreadPoolExecutor(max_workers=min(self.max_profiles, len(profiles) or 1)) as pool:
+                mount = TRACER.bind(self.mount_profile)
+                futures = {profile.name: pool.submit(mount, profile, progress) for profile in profiles}
+                results = {name: future.result() for name, future in futures.items()}
+        finally:
+            limits.clear()
+            limits.update(saved)
+        status = progress.status()
+        self.log(f"{format_status(status)} ({time.monotonic() - start:.1f}s)")
+        return results
+
+    def mount_profile(self, profile, progress):
+        username, password = profile_credentials(profile)
+        if not (username and password):
+            self.log(f"❌ {profile.name}: Keine Zugangsdaten in {profile.credentials_file}")
+            progress.finished(profile.name, failed=True)
+            return {'error': f"Keine Zugangsdaten in {profile.credentials_file}"}
+        try:
+            results = {}
+            for host, shares, base in self.core.mount_targets(profile.host, username, password, profile.mount_base):
+                names = filter_shares([share.name for share in shares], profile.include, profile.exclude)
+                if len(names) < len(shares):
+                    self.log(f"🔎 {profile.name}/{host}: {len(names)} von {len(shares)} Shares ausgewählt")
+                progress.planned(profile.name, len(names))
+                if profile.max_parallel:
+                    self.core.commands.host_limits.setdefault(host, profile.max_parallel)
+                results[host] = self.core.reconcile_host(
+                    host, names, base, username, password, prune=False,
+                    on_result=lambda result: progress.mounted(profile.name, result))
+        except (DiscoveryError, HelperError, Cancelled, OSError, ValueError) as e:
+            self.log(f"❌ {profile.name}: {e}")
+            progress.finished(profile.name, failed=True)
+            return {'error': str(e)}
+        progress.finished(profile.name)
+        return results
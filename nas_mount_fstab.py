@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+NAS Mount Manager - fstab
+Liest /etc/fstab in ein Modell (Zeilen plus unser Block zwischen Start- und
+End-Marker), vergleicht die Einträge mit den gewünschten
+und schreibt nur, wenn sich etwas geändert hat. Geschrieben wird über den
+privilegierten Helfer (temporäre Datei, fsync, rename); vorher wird gesichert,
+von den Sicherungen bleiben nur die neuesten. Welche Mount-Punkte neu
+eingebunden werden müssen, steht im FstabDiff.
+"""
+
+import glob
+import re
+import time
+from collections import namedtuple
+
+from nas_mount_table import unescape
+
+FSTAB_MARKER = '# NAS Permanent Mounts'
+BLOCK_HEADER = f"{FSTAB_MARKER} - Created by NAS Mount Manager"
+BLOCK_FOOTER = f"{FSTAB_MARKER} - Ende"
+DEFAULT_BACKUPS = 5
+
+FstabEntry = namedtuple('FstabEntry', 'source mount_point fstype options dump passno')
+# changed enthält (alt, neu)-Paare
+FstabDiff = namedtuple('FstabDiff', 'added removed changed unchanged')
+
+_ESCAPES = {' ': '\\040', '\t': '\\011', '\n': '\\012', '\\': '\\134'}
+
+
+def escape_field(value):
+    """Leerzeichen & Co. wie von getmntent erwartet als Oktal-Escape (My Data → My\\040Data)."""
+    return ''.join(_ESCAPES.get(char, char) for char in value)
+
+
+def parse_entry(line):
+    fields = line.split()
+    if len(fields) < 4 or fields[0].startswith('#'):
+        return None
+    fields += ['0'] * (6 - len(fields))
+    source, mount_point, fstype, options, dump, passno = fields[:6]
+    return FstabEntry(unescape(source), unescape(mount_point), fstype, options, dump, passno)
+
+
+def format_entry(entry):
+    return (f"{escape_field(entry.source)} {escape_field(entry.mount_point)} {entry.fstype} "
+            f"{entry.options} {entry.dump} {entry.passno}")
+
+
+def _is_legacy_entry(line):
+    # So hat der alte Block jeden Eintrag geschrieben
+    entry = parse_entry(line)
+    return entry is not None and entry.fstype == 'cifs' and 'x-systemd.automount' in entry.options.split(',')
+
+
+def diff_entries(current, desired):
+    """Vergleich über den Mount-Punkt; die Reihenfolge der Einträge spielt keine Rolle."""
+    old = {entry.mount_point: entry for entry in current}
+    new = {entry.mount_point: entry for entry in desired}
+    added = [entry for point, entry in new.items() if point not in old]
+    removed = [entry for point, entry in old.items() if point not in new]
+    changed = [(old[point], entry) for point, entry in new.items() if point in old and old[point] != entry]
+    unchanged = [entry for point, entry in new.items() if old.get(point) == entry]
+    return FstabDiff(added, removed, changed, unchanged)
+
+
+def has_changes(diff):
+    return bool(diff.added or diff.removed or diff.changed)
+
+
+class Fstab:
+    """Zeilen der Datei; unser Block liegt in lines[start:end]. Alles andere wird unverändert zurückgeschrieben."""
+
+    def __init__(self, lines, start=None, end=None):
+        self.lines = lines
+        self.start = start
+        self.end = end
+
+    @classmethod
+    def parse(cls, content):
+        lines = content.splitlines()
+        for i, line in enumerate(lines):
+            if line.startswith(FSTAB_MARKER) and line != BLOCK_FOOTER:
+                if BLOCK_FOOTER in lines[i + 1:]:
+                    return cls(lines, i, lines.index(BLOCK_FOOTER, i + 1) + 1)
+                # Älterer Block ohne End-Marker: nur die direkt folgenden Einträge in unserem
+                # Format, nicht "alles bis zur nächsten Leerzeile"
+                end = i + 1
+                while end < len(lines) and _is_legacy_entry(lines[end]):
+                    end += 1
+                return cls(lines, i, end)
+        return cls(lines)
+
+    @property
+    def has_block(self):
+        return self.start is not None
+
+    @property
+    def managed(self):
+        if not self.has_block:
+            return []
+        entries = (parse_entry(line) for line in self.lines[self.start + 1:self.end])
+        return [entry for entry in entries if entry is not None]
+
+    def render(self, entries):
+        block = [BLOCK_HEADER, *(format_entry(entry) for entry in entries), BLOCK_FOOTER] if entries else []
+        if self.has_block:
+            before, after = self.lines[:self.start], self.lines[self.end:]
+        else:
+            before, after = list(self.lines), []
+            if block:
+                while before and not before[-1].strip():
+                    before.pop()
+                before.append('')
+        lines = before + block + after
+        if not block and not after:
+            # Die Leerzeile vor einem entfernten Block am Dateiende nicht stehen lassen
+            while lines and not lines[-1].strip():
+                lines.pop()
+        return '\n'.join(lines) + '\n' if lines else ''
+
+
+class FstabManager:
+    """Schreibt den NAS-Block transaktional über den Helfer."""
+
+    def __init__(self, helper, fstab_path='/etc/fstab', backups=DEFAULT_BACKUPS):
+        self.helper = helper
+        self.fstab_path = fstab_path
+        self.backups = max(1, int(backups))
+
+    def read(self):
+        with open(self.fstab_path, 'r') as f:
+            return Fstab.parse(f.read())
+
+    def backup_files(self):
+        # Nur unsere eigenen Sicherungen (YYYYmmdd_HHMMSS, lexikografisch = chronologisch),
+        # nicht etwa eine von Hand angelegte fstab.backup.2019-01-01
+        own = re.compile(re.escape(self.fstab_path) + r'\.backup\.\d{8}_\d{6}')
+        return sorted(path for path in glob.glob(f"{glob.escape(self.fstab_path)}.backup.*") if own.fullmatch(path))
+
+    def backup(self):
+        backup = f"{self.fstab_path}.backup.{time.strftime('%Y%m%d_%H%M%S')}"
+        result = self.helper.call('copy', src=self.fstab_path, dst=backup)
+        if result.returncode != 0:
+            return result
+        older = [path for path in self.backup_files() if path != backup]
+        excess = older[:max(0, len(older) - (self.backups - 1))]
+        if excess:
+            self.helper.call('remove', paths=excess)
+        return result
+
+    def apply(self, entries):
+        """Liefert (OpResult oder None, FstabDiff); None heißt: nichts geändert, nichts geschrieben."""
+        fstab = self.read()
+        diff = diff_entries(fstab.managed, entries)
+        if not has_changes(diff):
+            return None, diff
+        result = self.backup()
+        if result.returncode != 0:
+            return result, diff
+        result = self.helper.call('write_file', path=self.fstab_path, content=fstab.render(entries), mode=0o644)
+        return result, diff
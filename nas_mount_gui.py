@@ -3,15 +3,30 @@
 NAS Mount Manager - GUI Version mit Permanent Mount
 Automatisches Mounten aller NAS-Shares mit GUI
 Permanent Mounts via fstab (wie Windows Netzlaufwerke)
+Die eigentliche Logik steckt in nas_mount_core.py (auch per nas_mount_cli.py nutzbar)
 """
 
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox, filedialog
-import subprocess
+import logging
+import logging.handlers
+import queue
 import threading
-import os
-import json
-from pathlib import Path
+import time
+
+from nas_mount_core import (NASMountCore, Cancelled, DiscoveryError, CONFIG_FILE, DEFAULT_MAX_PARALLEL,
+                             is_host_range, load_config, save_config)
+from nas_mount_fleet import (FleetMounter, Profile, credentials_path, format_status, load_profiles,
+                             save_profile)
+from nas_mount_monitor import ShareMonitor
+from nas_mount_table import MountWatcher
+from nas_mount_trace import TRACER
+
+LOG_TICK_MS = 100
+LOG_BATCH_LINES = 500
+LOG_FILE_MAX_BYTES = 1024 * 1024
+LOG_FILE_BACKUPS = 3
+QUIT_TIMEOUT = 15
 
 class NASMountManager:
     def __init__(self, root):
@@ -20,12 +35,22 @@ class NASMountManager:
         self.root.geometry("750x650")
         self.root.configure(bg='#f0f0f0')
         
-        self.config_file = Path.home() / '.nas_mount_config.json'
-        self.cred_file = Path.home() / '.smbcredentials'
+        self.config_file = CONFIG_FILE
+        self.log_queue = queue.Queue()
+        self.file_logger = None
+        self.share_monitor = None
+        self.worker = None
+        self.quit_deadline = None
+        self.fleet_active = False
         
         self.setup_gui()
+        self.core = NASMountCore(log=self.log_output)
         self.load_config()
+        self.setup_log_file()
+        self.root.after(LOG_TICK_MS, self.drain_log)
         self.check_permanent_mount_status()
+        self.mount_watcher = MountWatcher(self.on_mount_table_changed)
+        self.mount_watcher.start()
         
     def setup_gui(self):
         main_frame = ttk.Frame(self.root, padding="20")
@@ -37,7 +62,7 @@ class NASMountManager:
         
         row = 1
         
-        tk.Label(main_frame, text="🌐 NAS IP-Adresse:", font=('Arial', 10, 'bold'), 
+        tk.Label(main_frame, text="🌐 NAS IP / Bereich:", font=('Arial', 10, 'bold'), 
                 bg='#f0f0f0').grid(row=row, column=0, sticky=tk.W, pady=5)
         self.nas_ip_var = tk.StringVar(value="192.168.0.11")
         self.nas_ip_entry = ttk.Entry(main_frame, textvariable=self.nas_ip_var, width=30)
@@ -73,6 +98,14 @@ class NASMountManager:
                                command=self.browse_mount_path)
         browse_btn.grid(row=0, column=1, padx=(5, 0))
         
+        row += 1
+        tk.Label(main_frame, text="⚡ Parallele Mounts:", font=('Arial', 10, 'bold'), 
+                bg='#f0f0f0').grid(row=row, column=0, sticky=tk.W, pady=5)
+        self.max_parallel_var = tk.IntVar(value=DEFAULT_MAX_PARALLEL)
+        self.max_parallel_spin = ttk.Spinbox(main_frame, from_=1, to=64, 
+                                            textvariable=self.max_parallel_var, width=5)
+        self.max_parallel_spin.grid(row=row, column=1, sticky=tk.W, padx=(10, 0), pady=5)
+        
         row += 1
         self.permanent_var = tk.BooleanVar(value=False)
         permanent_check = ttk.Checkbutton(main_frame, 
@@ -89,6 +122,22 @@ class NASMountManager:
                                                bg='#f0f0f0', fg='#666')
         self.permanent_status_label.grid(row=row, column=0, columnspan=2, sticky=tk.W)
         
+        row += 1
+        self.monitor_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(main_frame, text="🩺 Mounts überwachen und hängende Shares neu mounten",
+                        variable=self.monitor_var,
+                        command=self.toggle_monitor).grid(row=row, column=0, columnspan=2, sticky=tk.W)
+        
+        row += 1
+        self.monitor_status_var = tk.StringVar(value="")
+        tk.Label(main_frame, textvariable=self.monitor_status_var, font=('Arial', 9, 'italic'),
+                bg='#f0f0f0', fg='#666').grid(row=row, column=0, columnspan=2, sticky=tk.W)
+        
+        row += 1
+        self.mount_status_var = tk.StringVar(value="")
+        tk.Label(main_frame, textvariable=self.mount_status_var, font=('Arial', 9, 'italic'),
+                bg='#f0f0f0', fg='#666').grid(row=row, column=0, columnspan=2, sticky=tk.W)
+        
         row += 1
         button_frame = ttk.Frame(main_frame)
         button_frame.grid(row=row, column=0, columnspan=2, pady=20)
@@ -105,6 +154,10 @@ class NASMountManager:
                                      command=self.unmount_all, width=20)
         self.unmount_btn.grid(row=0, column=2, padx=5)
         
+        self.cancel_btn = ttk.Button(button_frame, text="⏹️ Abbrechen", 
+                                    command=self.cancel, width=12, state='disabled')
+        self.cancel_btn.grid(row=0, column=3, padx=5)
+        
         row += 1
         self.status_var = tk.StringVar(value="Bereit")
         status_label = tk.Label(main_frame, textvariable=self.status_var, 
@@ -139,47 +192,143 @@ class NASMountManager:
         file_menu.add_command(label="Konfiguration speichern", command=self.save_config)
         file_menu.add_command(label="Konfiguration laden", command=self.load_config)
         file_menu.add_separator()
-        file_menu.add_command(label="Beenden", command=self.root.quit)
+        file_menu.add_command(label="Beenden", command=self.quit)
+        
+        extras_menu = tk.Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="Extras", menu=extras_menu)
+        extras_menu.add_command(label="Mount-Optionen optimieren", command=self.tune_mount_options)
+        self.warmup_var = tk.BooleanVar(value=False)
+        extras_menu.add_checkbutton(label="Verzeichnisse nach dem Mount vorladen", variable=self.warmup_var)
+        extras_menu.add_separator()
+        extras_menu.add_command(label="Eingaben als Profil speichern", command=self.save_as_profile)
+        extras_menu.add_command(label="Flotte mounten (alle Profile)", command=self.mount_fleet)
+        extras_menu.add_separator()
+        extras_menu.add_command(label="Langsamste Operationen anzeigen", command=self.show_trace_summary)
+        extras_menu.add_command(label="Trace exportieren...", command=self.export_trace)
         
         help_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Hilfe", menu=help_menu)
         help_menu.add_command(label="Über", command=self.show_about)
     
+    def run_worker(self, target):
+        self.worker = threading.Thread(target=target, daemon=True)
+        self.worker.start()
+    
+    def cancel(self):
+        self.cancel_btn.config(state='disabled')
+        self.status_var.set("Breche ab...")
+        self.core.cancel()
+    
+    def quit(self):
+        # Laufende Mounts nicht einfach liegen lassen: abbrechen und warten, bis der Worker aufgeräumt hat
+        if self.worker and self.worker.is_alive():
+            if self.quit_deadline is None:
+                self.quit_deadline = time.monotonic() + QUIT_TIMEOUT
+                self.cancel()
+            if time.monotonic() < self.quit_deadline:
+                self.root.after(LOG_TICK_MS, self.quit)
+                return
+        if self.share_monitor:
+            self.share_monitor.stop()
+        self.mount_watcher.stop()
+        self.core.close()
+        self.root.quit()
+    
     def browse_mount_path(self):
         path = filedialog.askdirectory(initialdir=self.mount_path_var.get())
         if path:
             self.mount_path_var.set(path)
     
-    def log_output(self, message):
+    def on_mount_table_changed(self, table):
         def update():
-            self.output_text.insert(tk.END, message + "\n")
-            self.output_text.see(tk.END)
-            self.root.update_idletasks()
+            mounts = table.under(self.mount_path_var.get().strip())
+            if mounts:
+                self.mount_status_var.set(f"🔗 {len(mounts)} Shares unter {self.mount_path_var.get().strip()} gemountet")
+            else:
+                self.mount_status_var.set("📭 Keine Shares gemountet")
         self.root.after(0, update)
     
-    def run_command(self, cmd):
+    def toggle_monitor(self):
+        if self.share_monitor:
+            monitor, self.share_monitor = self.share_monitor, None
+            threading.Thread(target=monitor.stop, daemon=True).start()
+            self.monitor_status_var.set("")
+            self.log_output("🩺 Überwachung beendet")
+            return
+        
+        username = self.username_var.get().strip()
+        password = self.password_var.get().strip()
+        if not all([username, password]):
+            self.log_output("❌ Für das Neu-Mounten werden Benutzername und Passwort benötigt!")
+            self.monitor_var.set(False)
+            return
+        
+        self.update_core_config()
+        config = self.core.config
+        self.share_monitor = ShareMonitor(self.core, self.mount_path_var.get().strip(), username, password,
+                                          interval=config['monitor_interval'],
+                                          slow_threshold=config['monitor_slow_threshold'],
+                                          workers=self.get_max_parallel(), metrics_file=config['metrics_file'],
+                                          log=self.log_output, on_cycle=self.on_monitor_cycle)
+        self.share_monitor.start()
+        self.log_output(f"🩺 Überwache {self.mount_path_var.get().strip()} alle {config['monitor_interval']}s")
+    
+    def on_monitor_cycle(self, healths):
+        latencies = [h.last_latency for h in healths if h.last_latency is not None]
+        problems = sum(1 for h in healths if h.status != 'ok')
+        status = f"🩺 {len(healths)} Shares geprüft"
+        if latencies:
+            status += f", max. {max(latencies) * 1000:.0f} ms"
+        status += f", {problems} mit Problemen" if problems else ", alle ok"
+        self.root.after(0, self.monitor_status_var.set, status)
+    
+    def setup_log_file(self):
+        log_file = self.core.config.get('log_file')
+        if not log_file:
+            return
+        handler = logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=LOG_FILE_MAX_BYTES, backupCount=LOG_FILE_BACKUPS, encoding='utf-8')
+        handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+        self.file_logger = logging.getLogger('nas_mount_manager')
+        self.file_logger.propagate = False
+        self.file_logger.setLevel(logging.INFO)
+        self.file_logger.addHandler(handler)
+    
+    def log_output(self, message):
+        # Wird aus Worker-Threads aufgerufen; das Widget wird nur in drain_log angefasst
+        self.log_queue.put(message)
+        if self.file_logger:
+            self.file_logger.info(message)
+    
+    def drain_log(self):
+        lines = []
         try:
-            result = subprocess.run(cmd, shell=True, capture_output=True, 
-                                  text=True, timeout=120)
-            return result.returncode, result.stdout, result.stderr
-        except subprocess.TimeoutExpired:
-            return 1, "", "Timeout nach 120 Sekunden"
-        except Exception as e:
-            return 1, "", str(e)
+            while len(lines) < LOG_BATCH_LINES:
+                lines.append(self.log_queue.get_nowait())
+        except queue.Empty:
+            pass
+        
+        if lines:
+            self.output_text.insert(tk.END, "\n".join(lines) + "\n")
+            max_lines = self.core.config['log_max_lines']
+            excess = int(self.output_text.index('end-1c').split('.')[0]) - 1 - max_lines
+            if excess > 0:
+                self.output_text.delete('1.0', f"{excess + 1}.0")
+            self.output_text.see(tk.END)
+        
+        self.root.after(LOG_TICK_MS, self.drain_log)
     
     def check_permanent_mount_status(self):
-        try:
-            with open('/etc/fstab', 'r') as f:
-                fstab_content = f.read()
-            if 'NAS Permanent Mounts' in fstab_content:
-                self.permanent_var.set(True)
-                self.permanent_status_var.set("✅ Permanent-Mount ist aktiviert (fstab)")
-            else:
-                self.permanent_var.set(False)
-                self.permanent_status_var.set("⚪ Permanent-Mount ist deaktiviert")
-        except:
+        enabled = self.core.permanent_enabled()
+        if enabled is None:
             self.permanent_var.set(False)
             self.permanent_status_var.set("")
+        elif enabled:
+            self.permanent_var.set(True)
+            self.permanent_status_var.set(f"✅ Permanent-Mount ist aktiviert ({enabled})")
+        else:
+            self.permanent_var.set(False)
+            self.permanent_status_var.set("⚪ Permanent-Mount ist deaktiviert")
     
     def toggle_permanent_mount(self):
         def toggle_worker():
@@ -191,11 +340,9 @@ class NASMountManager:
             except Exception as e:
                 self.log_output(f"❌ Fehler: {str(e)}")
                 self.permanent_var.set(not self.permanent_var.get())
-        threading.Thread(target=toggle_worker, daemon=True).start()
+        self.run_worker(toggle_worker)
     
     def setup_permanent_mount(self):
-        self.log_output("🔧 Richte Permanent-Mount ein (fstab)...")
-        
         nas_ip = self.nas_ip_var.get().strip()
         username = self.username_var.get().strip()
         password = self.password_var.get().strip()
@@ -206,118 +353,39 @@ class NASMountManager:
             self.permanent_var.set(False)
             return
         
-        self.log_output(f"📝 Erstelle Credentials-Datei...")
-        with open(self.cred_file, 'w') as f:
-            f.write(f"username={username}\n")
-            f.write(f"password={password}\n")
-        os.chmod(self.cred_file, 0o600)
-        self.log_output("✅ Credentials gesichert")
-        
-        cmd = f'timeout 30 smbclient -L "//{nas_ip}" -U "{username}%{password}" 2>/dev/null'
-        returncode, stdout, stderr = self.run_command(cmd)
-        
-        if returncode != 0:
-            self.log_output(f"❌ Kann Shares nicht scannen")
-            self.permanent_var.set(False)
-            return
-        
-        shares = []
-        for line in stdout.split('\n'):
-            if 'Disk' in line:
-                parts = line.split('Disk', 1)
-                if parts:
-                    share_name = parts[0].strip()
-                    if share_name and not share_name.startswith('$') and share_name != 'IPC':
-                        shares.append(share_name)
-        
-        if not shares:
-            self.log_output("❌ Keine Shares gefunden!")
-            self.permanent_var.set(False)
-            return
-        
-        self.log_output(f"📋 Gefunden: {len(shares)} Shares")
-        
-        for share in shares:
-            safe_name = share.replace(' ', '_').replace('/', '_')
-            mount_point = f"{mount_base}/{safe_name}"
-            subprocess.run(['sudo', 'mkdir', '-p', mount_point], capture_output=True)
-        
-        subprocess.run("sudo cp /etc/fstab /etc/fstab.backup.$(date +%Y%m%d_%H%M%S)", 
-                      shell=True, capture_output=True)
-        self.log_output("💾 fstab Backup erstellt")
-        
-        subprocess.run("sudo sed -i '/# NAS Permanent Mounts/,/^$/d' /etc/fstab", 
-                      shell=True, capture_output=True)
-        
-        uid = os.getuid()
-        gid = os.getgid()
-        
-        fstab_lines = ["\n# NAS Permanent Mounts - Created by NAS Mount Manager\n"]
-        for share in shares:
-            safe_name = share.replace(' ', '_').replace('/', '_')
-            share_escaped = share.replace(' ', '%20')
-            mount_point = f"{mount_base}/{safe_name}"
-            line = f"//{nas_ip}/{share_escaped} {mount_point} cifs credentials={self.cred_file},uid={uid},gid={gid},file_mode=0777,dir_mode=0777,vers=3.0,_netdev,x-systemd.automount 0 0\n"
-            fstab_lines.append(line)
-        
-        fstab_content = ''.join(fstab_lines)
-        with open('/tmp/nas_fstab_append', 'w') as f:
-            f.write(fstab_content)
-        
-        ret = subprocess.run("sudo tee -a /etc/fstab < /tmp/nas_fstab_append > /dev/null", 
-                           shell=True, capture_output=True)
-        
-        if ret.returncode == 0:
-            self.log_output("✅ fstab aktualisiert")
-            subprocess.run(['sudo', 'systemctl', 'daemon-reload'], capture_output=True)
-            subprocess.run(['sudo', 'mount', '-a'], capture_output=True)
-            
-            self.log_output("✅ Permanent-Mount aktiviert!")
-            self.log_output(f"💡 {len(shares)} Shares dauerhaft gemountet (überlebt Reboot)")
-            self.permanent_status_var.set("✅ Permanent-Mount ist aktiviert (fstab)")
+        self.update_core_config()
+        if self.core.enable_permanent(nas_ip, username, password, mount_base):
+            self.permanent_status_var.set(f"✅ Permanent-Mount ist aktiviert ({self.core.config['permanent_backend']})")
             self.save_config()
         else:
-            self.log_output("❌ Fehler beim Schreiben von fstab")
             self.permanent_var.set(False)
     
     def disable_permanent_mount(self):
-        self.log_output("🔧 Deaktiviere Permanent-Mount...")
-        
-        subprocess.run("sudo cp /etc/fstab /etc/fstab.backup.$(date +%Y%m%d_%H%M%S)", 
-                      shell=True, capture_output=True)
-        self.log_output("💾 fstab Backup erstellt")
-        
-        ret = subprocess.run("sudo sed -i '/# NAS Permanent Mounts/,/^$/d' /etc/fstab", 
-                           shell=True, capture_output=True)
-        
-        if ret.returncode == 0:
-            self.log_output("✅ fstab-Einträge entfernt")
-            
-            mount_base = self.mount_path_var.get().strip()
-            subprocess.run(['killall', 'kioworker'], capture_output=True)
-            
-            cmd = f'mount -t cifs | grep "{mount_base}"'
-            returncode, stdout, _ = self.run_command(cmd)
-            
-            if returncode == 0 and stdout.strip():
-                for line in stdout.strip().split('\n'):
-                    if mount_base in line:
-                        parts = line.split(' on ')
-                        if len(parts) > 1:
-                            mount_point = parts[1].split(' type')[0].strip()
-                            subprocess.run(['sudo', 'umount', mount_point], capture_output=True)
-            
-            self.log_output("✅ Permanent-Mount deaktiviert")
+        self.update_core_config()
+        if self.core.disable_permanent(self.mount_path_var.get().strip()):
             self.permanent_status_var.set("⚪ Permanent-Mount ist deaktiviert")
         else:
-            self.log_output("❌ Fehler")
             self.permanent_var.set(True)
     
+    def ask_install(self, packages):
+        """Fragt im Tk-Thread nach; der aufrufende Worker wartet auf die Antwort."""
+        answer = queue.Queue()
+        self.root.after(0, lambda: answer.put(messagebox.askyesno(
+            "Fehlende Programme",
+            f"Folgende Pakete fehlen:\n\n{chr(10).join(packages)}\n\nJetzt installieren?")))
+        return answer.get()
+    
     def scan_shares(self):
         def scan_worker():
             try:
                 self.set_busy(True, "Scanne Shares...")
                 
+                # Gecacht; ohne Cache (erster Start, neuer Kernel, ...) dauert allein 'sudo -n true'
+                # bis zu Sekunden, deshalb im Worker statt im Tk-Thread
+                _, packages = self.core.check_environment()
+                if packages and self.ask_install(packages):
+                    self.core.install_packages(packages)
+                
                 nas_ip = self.nas_ip_var.get().strip()
                 username = self.username_var.get().strip()
                 password = self.password_var.get().strip()
@@ -326,47 +394,29 @@ class NASMountManager:
                     self.log_output("❌ Bitte NAS IP-Adresse eingeben!")
                     return
                 
-                self.log_output(f"🔍 Scanne Shares auf {nas_ip}...")
-                
-                subprocess.run(['sudo', 'dnf', 'install', '-y', 'samba-client'], 
-                              capture_output=True)
-                
-                if username and password:
-                    cmd = f'timeout 30 smbclient -L "//{nas_ip}" -U "{username}%{password}" 2>/dev/null'
-                else:
-                    cmd = f'timeout 30 smbclient -L "//{nas_ip}" -N 2>/dev/null'
+                self.update_core_config()
+                hosts = self.core.scan(nas_ip, username, password, refresh=True)
                 
-                returncode, stdout, stderr = self.run_command(cmd)
-                
-                if returncode != 0:
-                    self.log_output(f"❌ Verbindungsfehler")
-                    return
-                
-                shares = []
-                for line in stdout.split('\n'):
-                    if 'Disk' in line:
-                        parts = line.split('Disk', 1)
-                        if parts:
-                            share_name = parts[0].strip()
-                            if share_name and not share_name.startswith('$') and share_name != 'IPC':
-                                shares.append(share_name)
-                
-                if not shares:
-                    self.log_output("❌ Keine Shares gefunden!")
-                    return
-                
-                self.log_output(f"✅ {len(shares)} Shares gefunden:")
-                for i, share in enumerate(shares, 1):
-                    self.log_output(f"   {i:2d}. {share}")
+                for host, shares in hosts.items():
+                    if not shares:
+                        self.log_output(f"❌ {host}: Keine Shares gefunden!")
+                        continue
+                    self.log_output(f"✅ {host}: {len(shares)} Shares gefunden:")
+                    for i, share in enumerate(shares, 1):
+                        self.log_output(f"   {i:2d}. {share.name}")
                 
                 self.save_config()
                 
+            except DiscoveryError as e:
+                self.log_output(f"❌ Kann Shares nicht scannen: {e}")
+            except Cancelled:
+                self.log_output("⏹️  Abgebrochen")
             except Exception as e:
                 self.log_output(f"❌ Fehler: {str(e)}")
             finally:
                 self.set_busy(False)
         
-        threading.Thread(target=scan_worker, daemon=True).start()
+        self.run_worker(scan_worker)
     
     def mount_all(self):
         def mount_worker():
@@ -382,97 +432,153 @@ class NASMountManager:
                     self.log_output("❌ Bitte alle Felder ausfüllen!")
                     return
                 
-                cmd = f'timeout 30 smbclient -L "//{nas_ip}" -U "{username}%{password}" 2>/dev/null'
-                returncode, stdout, stderr = self.run_command(cmd)
-                
-                if returncode != 0:
-                    self.log_output(f"❌ Kann Shares nicht scannen")
-                    return
-                
-                shares = []
-                for line in stdout.split('\n'):
-                    if 'Disk' in line:
-                        parts = line.split('Disk', 1)
-                        if parts:
-                            share_name = parts[0].strip()
-                            if share_name and not share_name.startswith('$') and share_name != 'IPC':
-                                shares.append(share_name)
-                
-                if not shares:
-                    self.log_output("❌ Keine Shares gefunden!")
-                    return
-                
-                self.log_output(f"🚀 Mounte {len(shares)} Shares...")
-                subprocess.run(['sudo', 'mkdir', '-p', mount_base], capture_output=True)
-                
-                success_count = 0
-                for share in shares:
-                    safe_name = share.replace(' ', '_').replace('/', '_')
-                    mount_point = os.path.join(mount_base, safe_name)
-                    
-                    subprocess.run(['sudo', 'mkdir', '-p', mount_point], capture_output=True)
-                    
-                    cmd = f'sudo mount -t cifs "//{nas_ip}/{share}" "{mount_point}" -o "username={username},password={password},uid=1000,gid=1000,file_mode=0777,dir_mode=0777,vers=3.0,soft,_netdev"'
-                    returncode, stdout, stderr = self.run_command(cmd)
-                    
-                    if returncode == 0:
-                        self.log_output(f"✅ {share:<20} → {mount_point}")
-                        success_count += 1
-                    else:
-                        self.log_output(f"❌ {share:<20} → FEHLER")
-                
-                self.log_output(f"📊 {success_count}/{len(shares)} Shares erfolgreich gemountet")
+                self.update_core_config()
+                self.core.reconcile(nas_ip, username, password, mount_base)
                 self.save_config()
                 
+            except DiscoveryError as e:
+                self.log_output(f"❌ Kann Shares nicht scannen: {e}")
+            except Cancelled:
+                self.log_output("⏹️  Abgebrochen")
             except Exception as e:
                 self.log_output(f"❌ Fehler: {str(e)}")
             finally:
                 self.set_busy(False)
         
-        threading.Thread(target=mount_worker, daemon=True).start()
+        self.run_worker(mount_worker)
     
     def unmount_all(self):
         def unmount_worker():
             try:
                 self.set_busy(True, "Unmounte alle Shares...")
-                mount_base = self.mount_path_var.get().strip()
+                self.update_core_config()
+                self.core.unmount(self.mount_path_var.get().strip())
                 
-                subprocess.run(['killall', 'kioworker'], capture_output=True)
+            except Cancelled:
+                self.log_output("⏹️  Abgebrochen")
+            except Exception as e:
+                self.log_output(f"❌ Fehler: {str(e)}")
+            finally:
+                self.set_busy(False)
+        
+        self.run_worker(unmount_worker)
+    
+    def tune_mount_options(self):
+        def tune_worker():
+            try:
+                self.set_busy(True, "Optimiere Mount-Optionen...")
                 
-                cmd = f'mount -t cifs | grep "{mount_base}"'
-                returncode, stdout, stderr = self.run_command(cmd)
+                nas_ip = self.nas_ip_var.get().strip()
+                username = self.username_var.get().strip()
+                password = self.password_var.get().strip()
+                mount_base = self.mount_path_var.get().strip()
                 
-                if returncode != 0 or not stdout.strip():
-                    self.log_output(f"📭 Keine Mounts gefunden")
+                if not all([nas_ip, username, password]):
+                    self.log_output("❌ Bitte alle Felder ausfüllen!")
+                    return
+                if is_host_range(nas_ip):
+                    self.log_output("❌ Die Optimierung braucht eine einzelne NAS IP, keinen Bereich!")
                     return
                 
-                self.log_output("🔽 Unmounte alle Shares...")
-                unmounted = 0
-                
-                for line in stdout.strip().split('\n'):
-                    if mount_base in line:
-                        parts = line.split(' on ')
-                        if len(parts) > 1:
-                            mount_point = parts[1].split(' type')[0].strip()
-                            returncode, _, _ = self.run_command(f'sudo umount "{mount_point}"')
-                            if returncode == 0:
-                                self.log_output(f"✅ {mount_point}")
-                                unmounted += 1
+                self.update_core_config()
+                tuned = self.core.tune(nas_ip, username, password, mount_base)
+                self.log_output(f"📊 {len(tuned)} Shares optimiert - gilt ab dem nächsten Mount")
+                self.save_config()
                 
-                self.log_output(f"📊 {unmounted} Shares unmounted")
+            except DiscoveryError as e:
+                self.log_output(f"❌ Kann Shares nicht scannen: {e}")
+            except Cancelled:
+                self.log_output("⏹️  Abgebrochen")
+            except Exception as e:
+                self.log_output(f"❌ Fehler: {str(e)}")
+            finally:
+                self.set_busy(False)
+        
+        self.run_worker(tune_worker)
+    
+    def save_as_profile(self):
+        nas_ip = self.nas_ip_var.get().strip()
+        username = self.username_var.get().strip()
+        password = self.password_var.get().strip()
+        if not all([nas_ip, username, password]):
+            self.log_output("❌ Bitte alle Felder ausfüllen!")
+            return
+        
+        # Jedes Profil bekommt eine eigene Credentials-Datei, damit mehrere NAS unterschiedliche Zugänge haben können
+        self.update_core_config()
+        cred_file = credentials_path(nas_ip)
+        try:
+            self.core.write_credentials(username, password, cred_file)
+        except OSError as e:
+            self.log_output(f"❌ Credentials konnten nicht gespeichert werden: {e}")
+            return
+        profile = Profile(name=nas_ip, host=nas_ip, username=username, credentials_file=str(cred_file),
+                          mount_base=self.mount_path_var.get().strip(), include=[], exclude=[], priority=0,
+                          max_parallel=self.get_max_parallel())
+        profiles = save_profile(self.core.config, profile)
+        self.save_config()
+        self.log_output(f"💾 Profil {nas_ip} gespeichert ({len(profiles)} Profile)")
+    
+    def mount_fleet(self):
+        try:
+            profiles = load_profiles(self.core.config)
+        except ValueError as e:
+            self.log_output(f"❌ Profile fehlerhaft: {e}")
+            return
+        
+        def fleet_worker():
+            try:
+                self.set_busy(True, f"Mounte {len(profiles)} Profile...")
+                self.update_core_config()
+                self.fleet_active = True
+                FleetMounter(self.core, log=self.log_output, on_progress=self.on_fleet_progress).run(profiles)
                 
+            except Cancelled:
+                self.log_output("⏹️  Abgebrochen")
             except Exception as e:
                 self.log_output(f"❌ Fehler: {str(e)}")
             finally:
+                self.fleet_active = False
                 self.set_busy(False)
         
-        threading.Thread(target=unmount_worker, daemon=True).start()
+        self.run_worker(fleet_worker)
+    
+    def on_fleet_progress(self, status):
+        def update():
+            # Späte Meldungen nach dem Ende nicht mehr anzeigen
+            if not self.fleet_active:
+                return
+            self.progress.stop()
+            self.progress.config(mode='determinate', maximum=max(1, status.shares_total),
+                                 value=status.shares_done)
+            self.status_var.set(format_status(status))
+        self.root.after(0, update)
+    
+    def show_trace_summary(self):
+        for line in TRACER.summary().splitlines():
+            self.log_output(line)
+    
+    def export_trace(self):
+        path = filedialog.asksaveasfilename(title="Trace exportieren", defaultextension=".json",
+                                            initialfile="nas_mount_trace.json",
+                                            filetypes=[("Chrome Trace", "*.json")])
+        if not path:
+            return
+        try:
+            TRACER.export_chrome(path)
+            self.log_output(f"💾 Trace gespeichert: {path} (chrome://tracing oder ui.perfetto.dev)")
+        except OSError as e:
+            self.log_output(f"❌ Trace konnte nicht gespeichert werden: {e}")
     
     def set_busy(self, busy, status=""):
         self.scan_btn.config(state='disabled' if busy else 'normal')
         self.mount_btn.config(state='disabled' if busy else 'normal')
         self.unmount_btn.config(state='disabled' if busy else 'normal')
+        self.cancel_btn.config(state='normal' if busy else 'disabled')
+        # Ein Abbruch gilt nur für die laufende Aktion
+        self.core.reset()
         
+        self.progress.config(mode='indeterminate', value=0)
         if busy:
             self.progress.start()
             self.status_var.set(status or "Arbeite...")
@@ -480,29 +586,35 @@ class NASMountManager:
             self.progress.stop()
             self.status_var.set("Bereit")
     
-    def save_config(self):
-        config = {
+    def get_max_parallel(self):
+        try:
+            return max(1, int(self.max_parallel_var.get()))
+        except (tk.TclError, ValueError):
+            return DEFAULT_MAX_PARALLEL
+    
+    def update_core_config(self):
+        self.core.config.update({
             'nas_ip': self.nas_ip_var.get(),
             'username': self.username_var.get(),
             'mount_path': self.mount_path_var.get(),
-            'permanent': self.permanent_var.get()
-        }
-        try:
-            with open(self.config_file, 'w') as f:
-                json.dump(config, f, indent=2)
-        except Exception as e:
-            pass
+            'permanent': self.permanent_var.get(),
+            'max_parallel': self.get_max_parallel(),
+            'warmup': self.warmup_var.get(),
+        })
+        self.core.configure()
+    
+    def save_config(self):
+        self.update_core_config()
+        save_config(self.core.config, self.config_file)
     
     def load_config(self):
-        if self.config_file.exists():
-            try:
-                with open(self.config_file, 'r') as f:
-                    config = json.load(f)
-                self.nas_ip_var.set(config.get('nas_ip', '192.168.0.11'))
-                self.username_var.set(config.get('username', ''))
-                self.mount_path_var.set(config.get('mount_path', '/mnt/nas'))
-            except:
-                pass
+        self.core.config.update(load_config(self.config_file))
+        config = self.core.config
+        self.nas_ip_var.set(config['nas_ip'])
+        self.username_var.set(config['username'])
+        self.mount_path_var.set(config['mount_path'])
+        self.max_parallel_var.set(config['max_parallel'])
+        self.warmup_var.set(config['warmup'])
     
     def show_about(self):
         messagebox.showinfo("Über", 
@@ -510,11 +622,18 @@ class NASMountManager:
             "Einfaches Tool zum Mounten von NAS-Shares\n"
             "✓ Automatische Share-Erkennung\n"
             "✓ Systemweite Mounts\n"
+            "✓ Paralleles Mounten\n"
             "✓ Share-Namen mit Leerzeichen\n"
-            "✓ Permanent-Mount via fstab\n\n"
+            "✓ Permanent-Mount via systemd-Automount\n"
+            "✓ Automatische Optimierung der Mount-Optionen\n"
+            "✓ Überwachung mit automatischem Neu-Mount\n"
+            "✓ Umgebungsprüfung statt Paketinstallation bei jedem Scan\n"
+            "✓ Mehrere NAS als Profile, gemeinsam mountbar\n"
+            "✓ Metadaten nach dem Mount vorladen\n\n"
             "Erstellt für einfache Linux-NAS-Integration")
 
 if __name__ == '__main__':
     root = tk.Tk()
     app = NASMountManager(root)
+    root.protocol("WM_DELETE_WINDOW", app.quit)
     root.mainloop()
\ No newline at end of file
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+NAS Mount Manager - Privilegierter Helfer
+Läuft einmal pro Sitzung als root (sudo) und führt strukturierte
+Operationen aus, die als JSON-Zeilen über stdin kommen. Für jede
+Operation wird eine JSON-Zeile mit derselben id auf stdout geschrieben.
+Operationen laufen parallel; voneinander abhängige Schritte muss der
+Aufrufer erst nach dem Ergebnis des vorherigen Schritts senden.
+Mit {"op": "cancel", "ids": [...]} werden laufende Befehle beendet; die
+abgebrochene Operation antwortet dann mit Exit-Code 130.
+"""
+
+import json
+import os
+import re
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_WORKERS = 16
+ALLOWED_SYSTEMCTL = {'daemon-reload', 'start', 'stop', 'enable', 'disable', 'restart'}
+CANCELLED_RETURNCODE = 130
+# So lange wird nach SIGKILL noch auf die Pipes gewartet (umount im D-Zustand stirbt nie)
+KILL_GRACE = 2
+INSTALL_COMMANDS = {
+    'dnf': ['dnf', 'install', '-y'],
+    'apt-get': ['apt-get', 'install', '-y'],
+    'zypper': ['zypper', '--non-interactive', 'install'],
+    'pacman': ['pacman', '-S', '--noconfirm'],
+}
+PACKAGE_NAME = re.compile(r'^[a-z0-9][a-z0-9.+_-]*$')
+
+# Laufende Befehle pro Anfrage-id, damit 'cancel' sie beenden kann
+_running = {}
+_active = set()
+_cancelled = set()
+_running_lock = threading.Lock()
+_current = threading.local()
+
+
+def run(args, timeout=None, env=None):
+    request_id = getattr(_current, 'id', None)
+    try:
+        process = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+                                   env=None if env is None else {**os.environ, **env},
+                                   start_new_session=True)
+    except OSError as e:
+        return 127, "", str(e)
+    with _running_lock:
+        if request_id in _cancelled:
+            kill(process)
+        _running[request_id] = process
+    try:
+        stdout, stderr = process.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        kill(process)
+        try:
+            process.communicate(timeout=KILL_GRACE)
+        except subprocess.TimeoutExpired:
+            # Prozess hängt im Kernel: Pipes aufgeben statt den Worker zu blockieren
+            for pipe in (process.stdout, process.stderr):
+                pipe.close()
+        return 124, "", f"Timeout nach {timeout} Sekunden"
+    finally:
+        with _running_lock:
+            _running.pop(request_id, None)
+    with _running_lock:
+        if request_id in _cancelled:
+            return CANCELLED_RETURNCODE, stdout, "Abgebrochen"
+    return process.returncode, stdout, stderr
+
+
+def kill(process):
+    # Ganze Prozessgruppe, sonst halten Kindprozesse (z.B. von mount.cifs) die Pipes offen
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except OSError:
+        process.kill()
+
+
+def cancel(ids):
+    """Läuft im Lese-Thread statt im Pool, damit ein voller Pool den Abbruch nicht aufhält."""
+    with _running_lock:
+        for request_id in ids:
+            if request_id not in _active:
+                continue
+            _cancelled.add(request_id)
+            process = _running.get(request_id)
+            if process and process.poll() is None:
+                kill(process)
+
+
+def op_ping(req):
+    return 0, "pong", ""
+
+
+def op_mkdir(req):
+    for path in req['paths']:
+        os.makedirs(path, exist_ok=True)
+    return 0, "", ""
+
+
+def op_mount(req):
+    args = ['mount', '-t', req.get('fstype', 'cifs'), req['source'], req['target']]
+    if req.get('options'):
+        args += ['-o', req['options']]
+    env = {'PASSWD': req['password']} if req.get('password') else None
+    return run(args, timeout=req.get('timeout'), env=env)
+
+
+def op_umount(req):
+    return run(['umount', *req.get('flags', []), req['target']], timeout=req.get('timeout'))
+
+
+def op_mount_fstab(req):
+    # Einzelnen Eintrag aus fstab einbinden (Quelle und Optionen stehen dort)
+    return run(['mount', req['target']], timeout=req.get('timeout'))
+
+
+def op_copy(req):
+    shutil.copy2(req['src'], req['dst'])
+    return 0, "", ""
+
+
+def op_write_file(req):
+    path = req['path']
+    directory = os.path.dirname(path) or '.'
+    mode = req.get('mode', 0o644)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.nas_mount_')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(req['content'])
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    # Auch das Umbenennen selbst muss auf der Platte sein
+    dir_fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+    return 0, "", ""
+
+
+def op_remove(req):
+    for path in req['paths']:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+    return 0, "", ""
+
+
+def op_rmdir(req):
+    for path in req['paths']:
+        try:
+            os.rmdir(path)
+        except FileNotFoundError:
+            pass
+    return 0, "", ""
+
+
+def op_systemctl(req):
+    args = req['args']
+    if not args or args[0] not in ALLOWED_SYSTEMCTL:
+        return 2, "", f"systemctl-Befehl nicht erlaubt: {args[:1]}"
+    return run(['systemctl', *args], timeout=req.get('timeout'))
+
+
+def op_install_packages(req):
+    manager, packages = req['manager'], req['packages']
+    if manager not in INSTALL_COMMANDS:
+        return 2, "", f"Paketmanager nicht erlaubt: {manager}"
+    invalid = [name for name in packages if not PACKAGE_NAME.match(name)]
+    if invalid or not packages:
+        return 2, "", f"Ungültige Paketnamen: {invalid}"
+    return run([*INSTALL_COMMANDS[manager], *packages], timeout=req.get('timeout'),
+               env={'DEBIAN_FRONTEND': 'noninteractive'})
+
+
+OPERATIONS = {
+    'ping': op_ping,
+    'mkdir': op_mkdir,
+    'mount': op_mount,
+    'umount': op_umount,
+    'mount_fstab': op_mount_fstab,
+    'copy': op_copy,
+    'write_file': op_write_file,
+    'remove': op_remove,
+    'rmdir': op_rmdir,
+    'systemctl': op_systemctl,
+    'install_packages': op_install_packages,
+}
+
+
+def handle(req):
+    start = time.monotonic()
+    _current.id = req.get('id')
+    handler = OPERATIONS.get(req.get('op'))
+    if handler is None:
+        returncode, stdout, stderr = 2, "", f"Unbekannte Operation: {req.get('op')}"
+    elif req.get('id') in _cancelled:
+        returncode, stdout, stderr = CANCELLED_RETURNCODE, "", "Abgebrochen"
+    else:
+        try:
+            returncode, stdout, stderr = handler(req)
+        except (OSError, KeyError, TypeError, ValueError) as e:
+            returncode, stdout, stderr = 1, "", str(e)
+    with _running_lock:
+        _active.discard(req.get('id'))
+        _cancelled.discard(req.get('id'))
+    return {'id': req.get('id'), 'returncode': returncode, 'stdout': stdout,
+            'stderr': stderr, 'duration': time.monotonic() - start}
+
+
+def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_WORKERS
+    write_lock = threading.Lock()
+
+    def respond(req):
+        response = handle(req)
+        with write_lock:
+            sys.stdout.write(json.dumps(response) + "\n")
+            sys.stdout.flush()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for line in sys.stdin:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                req = json.loads(line)
+            except ValueError as e:
+                with write_lock:
+                    sys.stdout.write(json.dumps({'id': None, 'returncode': 2, 'stdout': "",
+                                                 'stderr': str(e), 'duration': 0}) + "\n")
+                    sys.stdout.flush()
+                continue
+            if req.get('op') == 'exit':
+                break
+            if req.get('op') == 'cancel':
+                cancel(req.get('ids', []))
+                continue
+            with _running_lock:
+                _active.add(req.get('id'))
+            pool.submit(respond, req)
+
+
+if __name__ == '__main__':
+    main()
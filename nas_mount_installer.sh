@@ -23,19 +23,26 @@ fi
 echo "⬇️  Lade NAS Mount Manager herunter..."
 
 # Option A: Von GitHub
-SCRIPT_URL="https://raw.githubusercontent.com/tr1pp4/IPmountAllShares/main/nas_mount_gui.py"
+BASE_URL="https://raw.githubusercontent.com/tr1pp4/IPmountAllShares/main"
 
 # Option B: Von Ihrem NAS/Server
-# SCRIPT_URL="http://192.168.0.11/nas_mount_gui.py"
+# BASE_URL="http://192.168.0.11"
 
-curl -sSL "$SCRIPT_URL" -o /tmp/nas_mount_gui.py
+FILES="nas_mount_gui.py nas_mount_cli.py nas_mount_core.py nas_mount_helper.py nas_mount_table.py nas_mount_units.py nas_mount_tune.py nas_mount_monitor.py nas_mount_trace.py nas_mount_engine.py nas_mount_preflight.py nas_mount_fleet.py nas_mount_warmup.py nas_mount_fstab.py"
 
-if [ ! -f /tmp/nas_mount_gui.py ]; then
-    echo "❌ Download fehlgeschlagen!"
-    exit 1
-fi
+mkdir -p ~/bin
+for FILE in $FILES; do
+    curl -sSL "$BASE_URL/$FILE" -o "/tmp/$FILE"
+
+    if [ ! -f "/tmp/$FILE" ]; then
+        echo "❌ Download fehlgeschlagen: $FILE"
+        exit 1
+    fi
 
-chmod +x /tmp/nas_mount_gui.py
+    cp "/tmp/$FILE" ~/bin/
+done
+
+chmod +x ~/bin/nas_mount_gui.py ~/bin/nas_mount_cli.py
 
 # Desktop-Eintrag erstellen
 echo "🖥️  Erstelle Desktop-Verknüpfung..."
@@ -46,17 +53,12 @@ cat > ~/.local/share/applications/nas-mount-manager.desktop << EOF
 Type=Application
 Name=NAS Mount Manager
 Comment=Mount all NAS shares easily
-Exec=python3 /tmp/nas_mount_gui.py
+Exec=python3 $HOME/bin/nas_mount_gui.py
 Icon=folder-remote
 Terminal=false
 Categories=System;Network;
 EOF
 
-# Script nach ~/bin verschieben (optional)
-mkdir -p ~/bin
-cp /tmp/nas_mount_gui.py ~/bin/
-chmod +x ~/bin/nas_mount_gui.py
-
 # PATH anpassen falls nötig
 if [[ ":$PATH:" != *":$HOME/bin:"* ]]; then
     echo 'export PATH="$HOME/bin:$PATH"' >> ~/.bashrc
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+NAS Mount Manager - Überwachung
+Prüft alle CIFS-Mounts unter dem Mount-Pfad in festen Abständen mit einem
+statvfs-Roundtrip, mountet hängende oder dauerhaft langsame Shares mit
+exponentiellem Backoff neu und schreibt Latenz-Histogramme und
+Fehlerzähler für den Textfile-Collector des Prometheus node_exporter.
+"""
+
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from nas_mount_core import probe_latency
+from nas_mount_table import split_unc
+from nas_mount_trace import TRACER, traced
+
+DEFAULT_INTERVAL = 30
+DEFAULT_SLOW_THRESHOLD = 2.0
+DEFAULT_PROBE_TIMEOUT = 10
+DEFAULT_WORKERS = 8
+UNHEALTHY_BEFORE_REMOUNT = 2
+BACKOFF_MAX = 3600
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class ShareHealth:
+    """Zustand und Zähler eines überwachten Mount-Punkts."""
+
+    def __init__(self, entry):
+        self.entry = entry
+        self.host, self.share = split_unc(entry.source) or ('', entry.source)
+        self.status = 'ok'
+        self.last_latency = None
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.latency_sum = 0.0
+        self.latency_count = 0
+        self.errors = {'stale': 0, 'slow': 0}
+        self.remounts = {'ok': 0, 'failed': 0}
+        self.unhealthy = 0
+        self.attempts = 0
+        self.next_attempt = 0.0
+        # True, sobald wir selbst ausgehängt haben: dann verschwindet der Mount aus der
+        # Tabelle, soll aber weiter neu gemountet werden
+        self.lost = False
+
+    def observe(self, latency, slow_threshold):
+        self.last_latency = latency
+        if latency is None:
+            self.status = 'stale'
+        else:
+            self.latency_sum += latency
+            self.latency_count += 1
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if latency <= bound:
+                    self.buckets[i] += 1
+            self.status = 'slow' if latency > slow_threshold else 'ok'
+        if self.status == 'ok':
+            self.unhealthy = 0
+            self.attempts = 0
+            self.next_attempt = 0.0
+        else:
+            self.errors[self.status] += 1
+            self.unhealthy += 1
+
+    def needs_remount(self, now):
+        return (self.lost or self.unhealthy >= UNHEALTHY_BEFORE_REMOUNT) and now >= self.next_attempt
+
+    def remounted(self, ok, interval, now):
+        self.remounts['ok' if ok else 'failed'] += 1
+        if ok:
+            self.lost = False
+            self.unhealthy = 0
+            self.attempts = 0
+            self.next_attempt = 0.0
+            self.status = 'ok'
+        else:
+            self.attempts += 1
+            self.next_attempt = now + min(BACKOFF_MAX, interval * 2 ** self.attempts)
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_metrics(healths, cycle_seconds, timestamp):
+    lines = [
+        "# HELP nas_mount_probe_latency_seconds statvfs-Roundtrip pro Share",
+        "# TYPE nas_mount_probe_latency_seconds histogram",
+    ]
+    for health in healths:
+        labels = (f'host="{_label(health.host)}",share="{_label(health.share)}",'
+                  f'mount_point="{_label(health.entry.mount_point)}"')
+        for bound, count in zip(LATENCY_BUCKETS, health.buckets):
+            lines.append(f'nas_mount_probe_latency_seconds_bucket{{{labels},le="{bound}"}} {count}')
+        lines.append(f'nas_mount_probe_latency_seconds_bucket{{{labels},le="+Inf"}} {health.latency_count}')
+        lines.append(f'nas_mount_probe_latency_seconds_sum{{{labels}}} {health.latency_sum:.6f}')
+        lines.append(f'nas_mount_probe_latency_seconds_count{{{labels}}} {health.latency_count}')
+
+    lines += ["# HELP nas_mount_up 1 wenn der letzte Test erfolgreich war",
+              "# TYPE nas_mount_up gauge"]
+    lines += [f'nas_mount_up{{host="{_label(h.host)}",share="{_label(h.share)}"}} '
+              f'{0 if h.status == "stale" else 1}' for h in healths]
+
+    lines += ["# HELP nas_mount_probe_errors_total Fehlgeschlagene (stale) und langsame (slow) Tests",
+              "# TYPE nas_mount_probe_errors_total counter"]
+    lines += [f'nas_mount_probe_errors_total{{host="{_label(h.host)}",share="{_label(h.share)}",'
+              f'reason="{reason}"}} {count}' for h in healths for reason, count in h.errors.items()]
+
+    lines += ["# HELP nas_mount_remounts_total Automatische Neu-Mounts",
+              "# TYPE nas_mount_remounts_total counter"]
+    lines += [f'nas_mount_remounts_total{{host="{_label(h.host)}",share="{_label(h.share)}",'
+              f'result="{result}"}} {count}' for h in healths for result, count in h.remounts.items()]
+
+    lines += ["# HELP nas_mount_monitor_cycle_seconds Dauer des letzten Prüfdurchlaufs",
+              "# TYPE nas_mount_monitor_cycle_seconds gauge",
+              f"nas_mount_monitor_cycle_seconds {cycle_seconds:.6f}",
+              "# HELP nas_mount_monitor_last_run_timestamp_seconds Zeitpunkt des letzten Prüfdurchlaufs",
+              "# TYPE nas_mount_monitor_last_run_timestamp_seconds gauge",
+              f"nas_mount_monitor_last_run_timestamp_seconds {timestamp:.0f}"]
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics(path, content):
+    """Atomar ersetzen, damit der node_exporter nie eine halbe Datei liest.
+    Die temporäre Datei endet nicht auf .prom und wird deshalb nicht eingesammelt."""
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.nas_mount_', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(content)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class ShareMonitor:
+    """Prüft die Mounts unter mount_base im Hintergrund und mountet hängende Shares neu.
+    on_cycle(healths) wird nach jedem Durchlauf aus dem Überwachungs-Thread aufgerufen."""
+
+    def __init__(self, core, mount_base, username, password, interval=DEFAULT_INTERVAL,
+                 slow_threshold=DEFAULT_SLOW_THRESHOLD, probe_timeout=DEFAULT_PROBE_TIMEOUT,
+                 workers=DEFAULT_WORKERS, metrics_file='', log=print, on_cycle=None):
+        self.core = core
+        self.mount_base = mount_base
+        self.username = username
+        self.password = password
+        self.interval = interval
+        self.slow_threshold = slow_threshold
+        self.probe_timeout = max(probe_timeout, slow_threshold)
+        self.workers = max(1, int(workers))
+        self.metrics_file = metrics_file
+        self.log = log
+        self.on_cycle = on_cycle
+        self.healths = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if not self._thread:
+            return
+        self._thread.join(timeout=self.probe_timeout + 1)
+        self._thread = None
+
+    def run(self):
+        """Blockierend prüfen bis stop(); start() ruft das in einem eigenen Thread auf."""
+        while not self._stop.is_set():
+            try:
+                self.check()
+            except Exception as e:
+                self.log(f"❌ Überwachung: {e}")
+            self._stop.wait(self.interval)
+
+    @traced('monitor')
+    def check(self):
+        """Ein Durchlauf: alle Mounts testen, fällige Neu-Mounts ausführen, Metriken schreiben."""
+        start = time.monotonic()
+        entries = {entry.mount_point: entry for entry in self.core.mounted(self.mount_base)}
+        # Von außen ausgehängte Shares vergessen, selbst ausgehängte weiter betreuen
+        self.healths = {mount_point: health for mount_point, health in self.healths.items()
+                        if mount_point in entries or health.lost}
+        for mount_point, entry in entries.items():
+            if mount_point not in self.healths:
+                self.healths[mount_point] = ShareHealth(entry)
+
+        probed = [self.healths[mount_point] for mount_point in entries]
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(probed) or 1)) as pool:
+            probe = TRACER.bind(lambda h: probe_latency(h.entry.mount_point, self.probe_timeout))
+            latencies = list(pool.map(probe, probed))
+            for health, latency in zip(probed, latencies):
+                health.observe(latency, self.slow_threshold)
+                if health.status == 'stale':
+                    self.log(f"⚠️  {health.entry.mount_point} antwortet nicht")
+                elif health.status == 'slow':
+                    self.log(f"🐢 {health.entry.mount_point} langsam ({latency * 1000:.0f} ms)")
+
+            now = time.monotonic()
+            due = [health for health in self.healths.values() if health.needs_remount(now)]
+            for health, result in zip(due, pool.map(TRACER.bind(self.remount), due)):
+                health.remounted(result.ok, self.interval, time.monotonic())
+                if result.ok:
+                    self.log(f"🔁 {health.entry.mount_point} neu gemountet ({result.duration:.1f}s)")
+                else:
+                    health.lost = not self.core.mounted(health.entry.mount_point)
+                    wait = health.next_attempt - time.monotonic()
+                    self.log(f"❌ {health.entry.mount_point} → Neu-Mount fehlgeschlagen: {result.error} "
+                             f"(nächster Versuch in {wait:.0f}s)")
+
+        healths = list(self.healths.values())
+        if self.metrics_file:
+            try:
+                write_metrics(self.metrics_file, format_metrics(healths, time.monotonic() - start, time.time()))
+            except OSError as e:
+                self.log(f"❌ Metriken konnten nicht geschrieben werden: {e}")
+        if self.on_cycle:
+            self.on_cycle(healths)
+        return healths
+
+    def remount(self, health):
+        return self.core.remount(health.entry, self.username, self.password)
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+NAS Mount Manager - Umgebungsprüfung
+Prüft vor dem Scan, ob smbclient, mount.cifs, das cifs-Kernelmodul, sudo
+und (für Permanent-Mounts) systemd vorhanden sind. Das Ergebnis wird
+gecacht und nur neu ermittelt, wenn sich eines der beteiligten Programme
+(Pfad oder mtime), der Kernel oder die Gruppen des Benutzers ändern.
+Installiert wird nur, was tatsächlich fehlt (über den privilegierten Helfer).
+"""
+
+import json
+import os
+import shutil
+import subprocess
+from collections import namedtuple
+from pathlib import Path
+
+from nas_mount_trace import TRACER
+
+PREFLIGHT_CACHE_FILE = Path.home() / '.nas_mount_preflight.json'
+SBIN_DIRS = ('/usr/sbin', '/sbin')
+ADMIN_GROUPS = {'wheel', 'sudo', 'admin'}
+
+Check = namedtuple('Check', 'name ok detail package')
+
+# Paketnamen pro Paketmanager; 'cifs' ist das Kernelmodul
+PACKAGES = {
+    'dnf': {'smbclient': 'samba-client', 'mount.cifs': 'cifs-utils', 'cifs': 'kernel-modules-extra'},
+    'apt-get': {'smbclient': 'smbclient', 'mount.cifs': 'cifs-utils',
+                'cifs': f"linux-modules-extra-{os.uname().release}"},
+    'zypper': {'smbclient': 'samba-client', 'mount.cifs': 'cifs-utils'},
+    'pacman': {'smbclient': 'smbclient', 'mount.cifs': 'cifs-utils'},
+}
+
+
+def which(name):
+    # mount.cifs liegt oft in /usr/sbin, das bei normalen Benutzern nicht in PATH ist
+    return shutil.which(name) or shutil.which(name, path=os.pathsep.join(SBIN_DIRS))
+
+
+def package_manager():
+    for name in PACKAGES:
+        if which(name):
+            return name
+    return None
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime
+    except (OSError, TypeError):
+        return None
+
+
+def _modules_dep():
+    return f"/lib/modules/{os.uname().release}/modules.dep"
+
+
+def fingerprint():
+    """Alles, wovon das Ergebnis abhängt; ändert sich etwas davon, wird neu geprüft."""
+    binaries = {name: which(name) for name in ('smbclient', 'mount.cifs', 'sudo', 'systemctl')}
+    return {
+        'binaries': {name: [path, _mtime(path)] for name, path in binaries.items()},
+        'kernel': os.uname().release,
+        'modules_dep': _mtime(_modules_dep()),
+        'systemd': os.path.isdir('/run/systemd/system'),
+        'groups': sorted(os.getgroups()),
+    }
+
+
+def check_binary(name):
+    path = which(name)
+    if path:
+        return Check(name, True, path, None)
+    return Check(name, False, "nicht gefunden", name)
+
+
+def check_cifs_module():
+    try:
+        with open('/proc/filesystems', 'r') as f:
+            if any(line.split()[-1] == 'cifs' for line in f if line.strip()):
+                return Check('cifs', True, "geladen", None)
+    except OSError:
+        pass
+    try:
+        with open(_modules_dep(), 'r') as f:
+            if any('/cifs.ko' in line.split(':', 1)[0] for line in f):
+                return Check('cifs', True, "wird bei Bedarf geladen", None)
+    except OSError:
+        pass
+    return Check('cifs', False, f"Kernelmodul fehlt für {os.uname().release}", 'cifs')
+
+
+def check_sudo():
+    if os.geteuid() == 0:
+        return Check('sudo', True, "läuft als root", None)
+    if not which('sudo'):
+        return Check('sudo', False, "nicht gefunden", None)
+    # Wie run_command im Kern, das sich von hier aus nicht importieren lässt (Kern importiert dieses Modul)
+    args = ['sudo', '-n', 'true']
+    token = TRACER.begin('sudo', args)
+    try:
+        result = subprocess.run(args, capture_output=True, text=True, timeout=5)
+        returncode, stderr = result.returncode, result.stderr
+    except subprocess.TimeoutExpired:
+        returncode, stderr = 1, "Timeout nach 5 Sekunden"
+    except OSError as e:
+        returncode, stderr = 1, str(e)
+    TRACER.end(token, returncode, stderr)
+    if returncode == 0:
+        return Check('sudo', True, "ohne Passwort", None)
+    import grp
+    groups = set()
+    for gid in os.getgroups():
+        try:
+            groups.add(grp.getgrgid(gid).gr_name)
+        except KeyError:
+            continue
+    if groups & ADMIN_GROUPS:
+        return Check('sudo', True, "fragt nach dem Passwort", None)
+    return Check('sudo', False, f"Benutzer ist in keiner der Gruppen {', '.join(sorted(ADMIN_GROUPS))}", None)
+
+
+def check_systemd():
+    if os.path.isdir('/run/systemd/system') and which('systemctl'):
+        return Check('systemd', True, "aktiv", None)
+    return Check('systemd', False, "nicht aktiv (Permanent-Mount nur über fstab möglich)", None)
+
+
+def run_checks():
+    return [check_binary('smbclient'), check_binary('mount.cifs'), check_cifs_module(), check_sudo(),
+            check_systemd()]
+
+
+class Preflight:
+    """Führt die Prüfungen aus und cached das Ergebnis, solange sich der Fingerabdruck nicht ändert."""
+
+    def __init__(self, cache_file=PREFLIGHT_CACHE_FILE):
+        self.cache_file = Path(cache_file) if cache_file else None
+        self._cached = None
+
+    def _load(self):
+        if self._cached is not None or not self.cache_file:
+            return self._cached
+        try:
+            with open(self.cache_file, 'r') as f:
+                data = json.load(f)
+            self._cached = (data['fingerprint'], [Check(*check) for check in data['checks']])
+        except (OSError, ValueError, KeyError, TypeError):
+            self._cached = None
+        return self._cached
+
+    def _save(self, key, checks):
+        self._cached = (key, checks)
+        if not self.cache_file:
+            return
+        try:
+            with open(self.cache_file, 'w') as f:
+                json.dump({'fingerprint': key, 'checks': [list(check) for check in checks]}, f, indent=2)
+        except OSError:
+            pass
+
+    def run(self, refresh=False):
+        """Liefert (checks, aus_cache)."""
+        # JSON kennt keine Tupel: den Fingerabdruck einmal durch json schicken, damit er vergleichbar ist
+        key = json.loads(json.dumps(fingerprint()))
+        cached = None if refresh else self._load()
+        if cached and cached[0] == key:
+            return cached[1], True
+        checks = run_checks()
+        self._save(key, checks)
+        return checks, False
+
+    def invalidate(self):
+        self._cached = None
+        if self.cache_file:
+            try:
+                self.cache_file.unlink()
+            except OSError:
+                pass
+
+
+def missing_packages(checks, manager=None):
+    manager = manager or package_manager()
+    names = PACKAGES.get(manager, {})
+    return sorted({names[check.package] for check in checks
+                   if not check.ok and check.package in names})
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+NAS Mount Manager - Mount-Tabelle
+Liest /proc/self/mountinfo direkt (inkl. oktal-escapeter Pfade),
+indexiert CIFS-Mounts nach Mount-Punkt und Server/Share und
+beobachtet die Datei per poll() auf Änderungen des Kernels.
+"""
+
+import os
+import re
+import select
+import threading
+from collections import namedtuple
+
+MOUNTINFO = '/proc/self/mountinfo'
+CIFS_TYPES = ('cifs', 'smb3')
+
+MountEntry = namedtuple('MountEntry', 'mount_id parent_id device root mount_point '
+                                      'options fstype source super_options')
+
+_OCTAL_ESCAPE = re.compile(r'\\([0-7]{3})')
+
+
+def unescape(field):
+    return _OCTAL_ESCAPE.sub(lambda m: chr(int(m.group(1), 8)), field)
+
+
+def parse_line(line):
+    fields = line.split()
+    separator = fields.index('-')
+    mount_id, parent_id, device, root, mount_point, options = fields[:6]
+    fstype, source, super_options = (fields[separator + 1:separator + 4] + ['', '', ''])[:3]
+    return MountEntry(int(mount_id), int(parent_id), device, unescape(root),
+                      unescape(mount_point), options, fstype, unescape(source), super_options)
+
+
+def split_unc(source):
+    """'//server/share/sub' → ('server', 'share'); None für andere Quellen."""
+    if not source.startswith('//'):
+        return None
+    parts = source[2:].replace('\\', '/').split('/')
+    if len(parts) < 2 or not parts[0]:
+        return None
+    return parts[0], parts[1]
+
+
+def is_under(path, base):
+    base = base.rstrip('/') or '/'
+    return path == base or path.startswith(base if base == '/' else base + '/')
+
+
+class MountTable:
+    def __init__(self, entries):
+        self.entries = entries
+        self.cifs = [entry for entry in entries if entry.fstype in CIFS_TYPES]
+        self.by_mount_point = {entry.mount_point: entry for entry in self.cifs}
+        self.by_share = {}
+        for entry in self.cifs:
+            unc = split_unc(entry.source)
+            if unc:
+                key = (unc[0].lower(), unc[1].lower())
+                self.by_share.setdefault(key, []).append(entry)
+
+    @classmethod
+    def parse(cls, content):
+        entries = []
+        for line in content.splitlines():
+            if line.strip():
+                try:
+                    entries.append(parse_line(line))
+                except (ValueError, IndexError):
+                    continue
+        return cls(entries)
+
+    @classmethod
+    def read(cls, path=MOUNTINFO):
+        with open(path, 'r') as f:
+            return cls.parse(f.read())
+
+    def under(self, base):
+        return [entry for entry in self.cifs if is_under(entry.mount_point, base)]
+
+    def find_share(self, server, share):
+        return self.by_share.get((server.lower(), share.lower()), [])
+
+    def is_mounted(self, mount_point):
+        return mount_point.rstrip('/') in self.by_mount_point
+
+
+class MountWatcher:
+    """Ruft callback(MountTable) bei jeder Änderung der Mount-Tabelle auf (poll auf mountinfo)."""
+
+    def __init__(self, callback, path=MOUNTINFO):
+        self.callback = callback
+        self.path = path
+        self._thread = None
+        self._wake_r, self._wake_w = None, None
+
+    def start(self):
+        if self._thread:
+            return
+        self._wake_r, self._wake_w = os.pipe()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if not self._thread:
+            return
+        os.write(self._wake_w, b'x')
+        self._thread.join(timeout=2)
+        os.close(self._wake_r)
+        os.close(self._wake_w)
+        self._thread = None
+
+    def _run(self):
+        with open(self.path, 'r') as f:
+            poller = select.poll()
+            poller.register(f.fileno(), select.POLLPRI | select.POLLERR)
+            poller.register(self._wake_r, select.POLLIN)
+            while True:
+                f.seek(0)
+                self.callback(MountTable.parse(f.read()))
+                events = poller.poll()
+                if any(fd == self._wake_r for fd, _ in events):
+                    return
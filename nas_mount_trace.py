@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+NAS Mount Manager - Tracing
+Zeichnet jeden externen Aufruf (smbclient, Helfer-Operationen, statvfs-Tests)
+mit Phase, Share, Startzeit, Dauer, Exit-Code und stderr auf. Passwörter
+werden vor dem Speichern entfernt. Export als Chrome-Trace-JSON (chrome://tracing,
+Perfetto) oder als Tabelle der langsamsten Operationen.
+"""
+
+import functools
+import json
+import os
+import re
+import shlex
+import threading
+import time
+from collections import deque, namedtuple
+from contextlib import contextmanager
+
+DEFAULT_MAX_SPANS = 100000
+SECRET_PARAMS = {'password'}
+_SECRET_OPTION = re.compile(r'\b(password|pass|passwd)=[^,\s]*', re.IGNORECASE)
+
+Span = namedtuple('Span', 'name phase share command start duration returncode stderr thread')
+
+
+def redact(value):
+    """Entfernt Passwörter aus Befehlen, Optionsstrings und Helfer-Parametern."""
+    if isinstance(value, dict):
+        redacted = {}
+        for key, item in value.items():
+            if key in SECRET_PARAMS:
+                redacted[key] = '***'
+            elif key == 'content':
+                redacted[key] = f"<{len(item)} Bytes>"
+            else:
+                redacted[key] = redact(item)
+        return redacted
+    if isinstance(value, (list, tuple)):
+        items = [redact(item) for item in value]
+        # smbclient -U benutzer%passwort
+        for i, item in enumerate(items[:-1]):
+            if item == '-U' and isinstance(items[i + 1], str) and '%' in items[i + 1]:
+                items[i + 1] = items[i + 1].split('%', 1)[0] + '%***'
+        return items
+    if isinstance(value, str):
+        return _SECRET_OPTION.sub(r'\1=***', value)
+    return value
+
+
+def format_command(command):
+    if isinstance(command, (list, tuple)):
+        return shlex.join(str(part) for part in redact(command))
+    return redact(command)
+
+
+class Tracer:
+    """Sammelt Spans threadsicher; die Phase gilt pro Thread (siehe phase() und bind())."""
+
+    def __init__(self, max_spans=DEFAULT_MAX_SPANS):
+        self.spans = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self):
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextmanager
+    def phase(self, name):
+        stack = self._stack()
+        stack.append(name)
+        try:
+            yield
+        finally:
+            stack.pop()
+
+    def current_phase(self):
+        stack = self._stack()
+        return stack[-1] if stack else ''
+
+    def bind(self, func):
+        """Überträgt die aktuelle Phase auf Aufrufe in Worker-Threads (ThreadPoolExecutor)."""
+        phase = self.current_phase()
+        if not phase:
+            return func
+
+        def bound(*args, **kwargs):
+            with self.phase(phase):
+                return func(*args, **kwargs)
+        return bound
+
+    def begin(self, name, command, share=''):
+        return (name, format_command(command), share, self.current_phase(), time.time(),
+                time.monotonic(), threading.get_ident())
+
+    def end(self, token, returncode, stderr=''):
+        name, command, share, phase, start, started, thread = token
+        span = Span(name, phase, share, command, start, time.monotonic() - started, returncode,
+                    redact((stderr or '').strip())[-500:], thread)
+        with self._lock:
+            self.spans.append(span)
+        return span
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.spans)
+
+    def clear(self):
+        with self._lock:
+            self.spans.clear()
+
+    def chrome_trace(self):
+        """Trace-Event-Format: ein 'X'-Event pro Span, eine Spur pro Thread."""
+        pid = os.getpid()
+        events = [{
+            'name': span.name,
+            'cat': span.phase or 'sonstige',
+            'ph': 'X',
+            'ts': int(span.start * 1e6),
+            'dur': int(span.duration * 1e6),
+            'pid': pid,
+            'tid': span.thread,
+            'args': {'command': span.command, 'share': span.share,
+                     'returncode': span.returncode, 'stderr': span.stderr},
+        } for span in self.snapshot()]
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def export_chrome(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.chrome_trace(), f)
+
+    def summary(self, limit=15):
+        """Gesamtzeit pro Phase und Operation, danach die langsamsten Einzelaufrufe."""
+        spans = self.snapshot()
+        if not spans:
+            return "Keine Aufrufe aufgezeichnet"
+        totals = {}
+        for span in spans:
+            count, total, slowest, failed = totals.get((span.phase, span.name), (0, 0.0, 0.0, 0))
+            totals[(span.phase, span.name)] = (count + 1, total + span.duration,
+                                               max(slowest, span.duration), failed + (span.returncode != 0))
+
+        lines = [f"{'Phase':<12}{'Operation':<22}{'Anzahl':>8}{'Gesamt s':>10}{'Max ms':>9}{'Fehler':>8}"]
+        lines.append('-' * len(lines[0]))
+        for (phase, name), (count, total, slowest, failed) in sorted(totals.items(), key=lambda item: -item[1][1]):
+            lines.append(f"{phase or '-':<12}{name:<22}{count:>8}{total:>10.2f}{slowest * 1000:>9.1f}{failed:>8}")
+
+        lines.append("")
+        header = f"{'Dauer ms':>9}  {'Phase':<12}{'Operation':<22}{'Exit':>5}  Share / Fehler"
+        lines += [header, '-' * len(header)]
+        for span in sorted(spans, key=lambda s: -s.duration)[:limit]:
+            detail = span.share + (f"  {span.stderr.splitlines()[-1]}" if span.stderr else '')
+            lines.append(f"{span.duration * 1000:>9.1f}  {span.phase or '-':<12}{span.name:<22}"
+                         f"{span.returncode:>5}  {detail}")
+        return "\n".join(lines)
+
+
+TRACER = Tracer()
+
+
+def traced(phase):
+    """Dekorator: alle Aufrufe innerhalb der Funktion laufen unter dieser Phase."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with TRACER.phase(phase):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
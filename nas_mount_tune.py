@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+NAS Mount Manager - Optimierung der Mount-Optionen
+Mountet einen Share nacheinander mit verschiedenen Optionssätzen
+(SMB-Version, rsize/wsize, cache=, actimeo, multichannel) an einem
+temporären Mount-Punkt, misst sequentielles Schreiben/Lesen und
+Metadaten-Operationen und merkt sich den schnellsten Satz pro Share.
+Die Suche ist gierig: jede Dimension wird einzeln auf den bisher
+besten Satz angewendet, statt alle Kombinationen zu probieren.
+"""
+
+import os
+import shutil
+import time
+from collections import namedtuple
+
+from nas_mount_engine import Cancelled
+
+DEFAULT_OPTIONS = 'vers=3.0'
+DEFAULT_PROBE_SIZE_MB = 64
+DEFAULT_PROBE_FILES = 200
+MIN_IMPROVEMENT = 0.05
+BLOCK_SIZE = 1024 * 1024
+
+# (Name, Alternativen); None-Werte sind Flags ohne '=...'
+TUNING_DIMENSIONS = [
+    ('vers', [{'vers': '3.1.1'}, {'vers': '3.0'}, {'vers': '2.1'}]),
+    ('rsize/wsize', [{'rsize': '4194304', 'wsize': '4194304'}, {'rsize': '1048576', 'wsize': '1048576'}]),
+    ('cache', [{'cache': 'loose'}, {'cache': 'strict'}]),
+    ('actimeo', [{'actimeo': '30'}, {'actimeo': '1'}]),
+    ('multichannel', [{'multichannel': None, 'max_channels': '4'}]),
+]
+
+ProbeResult = namedtuple('ProbeResult', 'options ok write_mbps read_mbps meta_ops seconds error')
+
+
+def parse_options(options):
+    parsed = {}
+    for item in filter(None, (options or '').split(',')):
+        key, sep, value = item.partition('=')
+        parsed[key] = value if sep else None
+    return parsed
+
+
+def format_options(options):
+    return ','.join(key if value is None else f"{key}={value}" for key, value in options.items())
+
+
+def tuned_key(host, share):
+    return f"{host}/{share}"
+
+
+def run_probe(directory, size_mb=DEFAULT_PROBE_SIZE_MB, files=DEFAULT_PROBE_FILES):
+    """Schreibt/liest eine Testdatei und erzeugt/stat-et/löscht viele kleine Dateien.
+    Liefert (write_mbps, read_mbps, meta_ops, seconds)."""
+    block = os.urandom(BLOCK_SIZE)
+    path = os.path.join(directory, 'throughput.bin')
+
+    start = time.monotonic()
+    with open(path, 'wb') as f:
+        for _ in range(size_mb):
+            f.write(block)
+        f.flush()
+        os.fsync(f.fileno())
+    write_time = time.monotonic() - start
+
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        # Seitencache verwerfen, sonst misst das Lesen nur den lokalen RAM
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        start = time.monotonic()
+        while os.read(fd, BLOCK_SIZE):
+            pass
+        read_time = time.monotonic() - start
+    finally:
+        os.close(fd)
+    os.unlink(path)
+
+    meta_dir = os.path.join(directory, 'meta')
+    start = time.monotonic()
+    os.mkdir(meta_dir)
+    for i in range(files):
+        with open(os.path.join(meta_dir, f"f{i:05d}"), 'wb') as f:
+            f.write(b'x')
+    for name in os.listdir(meta_dir):
+        os.stat(os.path.join(meta_dir, name))
+    shutil.rmtree(meta_dir)
+    meta_time = time.monotonic() - start
+
+    return (size_mb / write_time if write_time else 0.0,
+            size_mb / read_time if read_time else 0.0,
+            files * 3 / meta_time if meta_time else 0.0,
+            write_time + read_time + meta_time)
+
+
+class MountTuner:
+    def __init__(self, helper, base_options, probe_base, size_mb=DEFAULT_PROBE_SIZE_MB,
+                 files=DEFAULT_PROBE_FILES, timeout=30, log=print):
+        self.helper = helper
+        self.base_options = base_options
+        self.probe_base = probe_base
+        self.size_mb = size_mb
+        self.files = files
+        self.timeout = timeout
+        self.log = log
+
+    def probe(self, host, share, password, options, mount_point):
+        option_string = format_options(options)
+        try:
+            result = self.helper.call('mount', source=f"//{host}/{share}", target=mount_point,
+                                      options=f"{self.base_options},{option_string}",
+                                      password=password, timeout=self.timeout)
+        except Cancelled:
+            # Der Mount kann im Helfer trotzdem noch fertig geworden sein
+            self.unmount(mount_point)
+            raise
+        if result.returncode != 0:
+            return ProbeResult(option_string, False, 0, 0, 0, 0, result.stderr.strip() or "mount fehlgeschlagen")
+        work_dir = os.path.join(mount_point, f".nas_mount_tune_{os.getpid()}")
+        try:
+            os.mkdir(work_dir)
+            try:
+                write_mbps, read_mbps, meta_ops, seconds = run_probe(work_dir, self.size_mb, self.files)
+            finally:
+                shutil.rmtree(work_dir, ignore_errors=True)
+            return ProbeResult(option_string, True, write_mbps, read_mbps, meta_ops, seconds, '')
+        except OSError as e:
+            return ProbeResult(option_string, False, 0, 0, 0, 0, str(e))
+        finally:
+            self.unmount(mount_point)
+
+    def unmount(self, mount_point):
+        self.helper.call('umount', target=mount_point, timeout=self.timeout, cleanup=True)
+
+    def tune(self, host, share, password, start_options=DEFAULT_OPTIONS):
+        """Liefert (beste Optionen als String, [ProbeResult, ...])."""
+        mount_point = os.path.join(self.probe_base, f"{host}_{share}".replace('/', '_').replace(' ', '_'))
+        self.helper.call('mkdir', paths=[mount_point])
+        try:
+            best_options = parse_options(start_options)
+            best = self.probe(host, share, password, best_options, mount_point)
+            self.log_probe(share, best)
+            results = [best]
+            if not best.ok:
+                return None, results
+
+            for name, alternatives in TUNING_DIMENSIONS:
+                for alternative in alternatives:
+                    candidate = {**best_options, **alternative}
+                    if candidate == best_options:
+                        continue
+                    result = self.probe(host, share, password, candidate, mount_point)
+                    results.append(result)
+                    self.log_probe(share, result)
+                    if result.ok and result.seconds < best.seconds * (1 - MIN_IMPROVEMENT):
+                        best, best_options = result, candidate
+            return best.options, results
+        finally:
+            # probe_base bleibt stehen, solange noch etwas darin liegt
+            self.helper.call('rmdir', paths=[mount_point, self.probe_base], cleanup=True)
+
+    def log_probe(self, share, result):
+        if result.ok:
+            self.log(f"   📏 {share:<20} {result.options:<60} W {result.write_mbps:7.1f} MB/s  "
+                     f"R {result.read_mbps:7.1f} MB/s  Meta {result.meta_ops:7.0f} Ops/s")
+        else:
+            self.log(f"   ⚠️  {share:<20} {result.options:<60} {result.error}")
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+NAS Mount Manager - systemd Mount-Units
+Erzeugt pro Share ein .mount/.automount-Paar in /etc/systemd/system.
+Die Shares werden erst beim ersten Zugriff verbunden und nach einer
+Leerlaufzeit wieder getrennt; Boot und Login warten nicht auf das NAS.
+"""
+
+import os
+from collections import namedtuple
+
+UNIT_DIR = '/etc/systemd/system'
+UNIT_MARKER = '# Created by NAS Mount Manager'
+DEFAULT_IDLE_TIMEOUT = 600
+DEFAULT_MOUNT_TIMEOUT = 30
+
+UnitPair = namedtuple('UnitPair', 'name mount_unit automount_unit mount_content automount_content')
+
+_SAFE_CHARS = set('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789:_.')
+
+
+def escape_path(path):
+    """Wie 'systemd-escape --path': /mnt/nas/My Data → mnt-nas-My\\x20Data"""
+    path = '/'.join(part for part in path.split('/') if part)
+    if not path:
+        return '-'
+    escaped = []
+    for i, char in enumerate(path):
+        if char == '/':
+            escaped.append('-')
+        elif char in _SAFE_CHARS and not (i == 0 and char == '.'):
+            escaped.append(char)
+        else:
+            escaped.extend(f"\\x{byte:02x}" for byte in char.encode('utf-8'))
+    return ''.join(escaped)
+
+
+def _unit_value(value):
+    # '%' leitet in Unit-Dateien Platzhalter ein
+    return value.replace('%', '%%')
+
+
+def build_units(host, share, mount_point, options, idle_timeout=DEFAULT_IDLE_TIMEOUT,
+                mount_timeout=DEFAULT_MOUNT_TIMEOUT):
+    name = escape_path(mount_point)
+    what = _unit_value(f"//{host}/{share}")
+    mount_content = f"""{UNIT_MARKER}
+[Unit]
+Description=NAS Share {what}
+Wants=network-online.target
+After=network-online.target
+
+[Mount]
+What={what}
+Where={_unit_value(mount_point)}
+Type=cifs
+Options={_unit_value(options)}
+TimeoutSec={mount_timeout}
+"""
+    automount_content = f"""{UNIT_MARKER}
+[Unit]
+Description=Automount NAS Share {what}
+
+[Automount]
+Where={_unit_value(mount_point)}
+TimeoutIdleSec={idle_timeout}
+
+[Install]
+WantedBy=remote-fs.target
+"""
+    return UnitPair(name, f"{name}.mount", f"{name}.automount", mount_content, automount_content)
+
+
+def installed_units(unit_dir=UNIT_DIR):
+    """Alle von uns angelegten Unit-Dateien (erkennbar an der Marker-Zeile)."""
+    units = []
+    try:
+        names = os.listdir(unit_dir)
+    except OSError:
+        return units
+    for name in sorted(names):
+        if not name.endswith(('.mount', '.automount')):
+            continue
+        try:
+            with open(os.path.join(unit_dir, name), 'r') as f:
+                if f.readline().rstrip('\n') == UNIT_MARKER:
+                    units.append(name)
+        except OSError:
+            continue
+    return units
+
+
+def install_units(helper, pairs, unit_dir=UNIT_DIR, log=print):
+    """Schreibt alle Units, entfernt veraltete und startet die Automounts in einer Transaktion."""
+    wanted = {unit for pair in pairs for unit in (pair.mount_unit, pair.automount_unit)}
+    stale = [unit for unit in installed_units(unit_dir) if unit not in wanted]
+    if stale:
+        remove_units(helper, stale, unit_dir, reload=False)
+        log(f"🧹 {len(stale)} veraltete Units entfernt")
+
+    writes = []
+    for pair in pairs:
+        writes.append(('write_file', {'path': os.path.join(unit_dir, pair.mount_unit),
+                                      'content': pair.mount_content, 'mode': 0o644}))
+        writes.append(('write_file', {'path': os.path.join(unit_dir, pair.automount_unit),
+                                      'content': pair.automount_content, 'mode': 0o644}))
+    failed = [result for result in helper.run_batch(writes) if result.returncode != 0]
+    if failed:
+        return failed[0]
+
+    result = helper.call('systemctl', args=['daemon-reload'])
+    if result.returncode != 0:
+        return result
+    automounts = [pair.automount_unit for pair in pairs]
+    # enable --now mit allen Units: systemd reiht alle Start-Jobs in einer Transaktion ein
+    return helper.call('systemctl', args=['enable', '--now', *automounts], timeout=120)
+
+
+def remove_units(helper, units, unit_dir=UNIT_DIR, reload=True):
+    automounts = [unit for unit in units if unit.endswith('.automount')]
+    mounts = [unit for unit in units if unit.endswith('.mount')]
+    if automounts:
+        helper.call('systemctl', args=['disable', '--now', *automounts], timeout=120)
+    if mounts:
+        helper.call('systemctl', args=['stop', *mounts], timeout=120)
+    result = helper.call('remove', paths=[os.path.join(unit_dir, unit) for unit in units])
+    if reload:
+        helper.call('systemctl', args=['daemon-reload'])
+    return result
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+NAS Mount Manager - Metadaten vorladen
+Läuft nach dem Mount einmal mit os.scandir bis zu einer festen Tiefe über
+die frisch gemounteten Shares, damit Attribut- und Dentry-Cache des
+CIFS-Clients warm sind, bevor Dateimanager oder Indexer das erste Mal
+hineinschauen. Alle Shares teilen sich einen Pool von Worker-Threads, die
+mit niedriger Priorität laufen; pro Share gilt ein Budget an Einträgen.
+Abbrechen über cancel() oder die übergebene should_stop-Funktion.
+"""
+
+import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from nas_mount_trace import TRACER
+
+DEFAULT_DEPTH = 2
+DEFAULT_MAX_ENTRIES = 10000
+DEFAULT_WORKERS = 8
+WARMUP_NICE = 19
+
+WarmupStats = namedtuple('WarmupStats', 'mount_point entries dirs errors seconds truncated cancelled')
+
+
+def _lower_priority():
+    # Unter Linux gilt setpriority(PRIO_PROCESS, 0) nur für den aufrufenden Thread
+    try:
+        os.setpriority(os.PRIO_PROCESS, 0, WARMUP_NICE)
+    except (AttributeError, OSError):
+        pass
+
+
+class _Walk:
+    """Zähler eines Shares; Einträge werden unter dem Lock gegen das Budget gebucht."""
+
+    def __init__(self, mount_point, budget):
+        self.mount_point = mount_point
+        self.budget = budget
+        self.entries = 0
+        self.dirs = 0
+        self.errors = 0
+        self.truncated = False
+        self.start = time.monotonic()
+        self.seconds = 0.0
+        self.pending = 0
+        self.lock = threading.Lock()
+
+    def take(self):
+        with self.lock:
+            if self.entries >= self.budget:
+                self.truncated = True
+                return False
+            self.entries += 1
+            return True
+
+
+class MetadataWarmer:
+    def __init__(self, depth=DEFAULT_DEPTH, max_entries=DEFAULT_MAX_ENTRIES, workers=DEFAULT_WORKERS,
+                 log=print, should_stop=None):
+        self.depth = max(0, int(depth))
+        self.max_entries = max(1, int(max_entries))
+        self.workers = max(1, int(workers))
+        self.log = log
+        self.should_stop = should_stop
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def stopped(self):
+        return self._cancelled.is_set() or bool(self.should_stop and self.should_stop())
+
+    def _scan(self, walk, path):
+        """Liest ein Verzeichnis; liefert die Unterverzeichnisse für die nächste Ebene."""
+        subdirs = []
+        if walk.truncated or self.stopped():
+            return subdirs
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if self.stopped() or not walk.take():
+                        break
+                    # stat() füllt den Attribut-Cache, is_dir() entscheidet über den Abstieg
+                    entry.stat(follow_symlinks=False)
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+        except OSError:
+            with walk.lock:
+                walk.errors += 1
+        with walk.lock:
+            walk.dirs += 1
+        return subdirs
+
+    def warm_all(self, mount_points):
+        """Liefert [WarmupStats] in der Reihenfolge der mount_points."""
+        walks = [_Walk(mount_point, self.max_entries) for mount_point in mount_points]
+        if not walks:
+            return []
+        tokens = {id(walk): TRACER.begin('scandir', ['scandir', walk.mount_point], walk.mount_point)
+                  for walk in walks}
+        pool = ThreadPoolExecutor(max_workers=self.workers, initializer=_lower_priority)
+        futures = {}
+
+        def submit(walk, path, depth):
+            walk.pending += 1
+            futures[pool.submit(self._scan, walk, path)] = (walk, depth)
+
+        try:
+            for walk in walks:
+                submit(walk, walk.mount_point, 0)
+            while futures:
+                done, _ = wait(list(futures), return_when=FIRST_COMPLETED)
+                for future in done:
+                    walk, depth = futures.pop(future)
+                    walk.pending -= 1
+                    subdirs = future.result()
+                    if depth < self.depth and not walk.truncated and not self.stopped():
+                        for path in subdirs:
+                            submit(walk, path, depth + 1)
+                    if not walk.pending:
+                        self._finish(walk, tokens[id(walk)])
+        finally:
+            # Bei Abbruch nicht auf wartende Verzeichnisse warten; laufende scandir-Aufrufe enden von selbst
+            pool.shutdown(wait=False, cancel_futures=True)
+        cancelled = self.stopped()
+        return [WarmupStats(walk.mount_point, walk.entries, walk.dirs, walk.errors, walk.seconds,
+                            walk.truncated, cancelled) for walk in walks]
+
+    def _finish(self, walk, token):
+        walk.seconds = time.monotonic() - walk.start
+        stopped = self.stopped()
+        returncode = 130 if stopped else (1 if walk.errors else 0)
+        TRACER.end(token, returncode, f"{walk.errors} Verzeichnisse nicht lesbar" if walk.errors else '')
+        note = " (Budget erreicht)" if walk.truncated else (" (abgebrochen)" if stopped else "")
+        self.log(f"🔥 {walk.mount_point}: {walk.entries} Einträge in {walk.dirs} Verzeichnissen "
+                 f"({walk.seconds:.1f}s){note}")
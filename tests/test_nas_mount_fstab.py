@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Tests für nas_mount_fstab: Block erkennen, schreiben, entfernen und vergleichen."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nas_mount_fstab import (BLOCK_FOOTER, BLOCK_HEADER, FSTAB_MARKER, Fstab, FstabEntry,  # noqa: E402
+                             FstabManager, diff_entries, format_entry, has_changes, parse_entry)
+
+SYSTEM = "UUID=0000 / ext4 defaults 0 1\n"
+OPTIONS = 'credentials=/root/.smbcredentials,uid=1000,_netdev,x-systemd.automount'
+
+
+def entry(share, base='/mnt/nas'):
+    return FstabEntry(f"//192.168.0.11/{share}", f"{base}/{share}", 'cifs', OPTIONS, '0', '0')
+
+
+def test_legacy_block_keeps_following_foreign_lines():
+    foreign = "//10.0.0.5/backup /mnt/backup cifs credentials=/etc/smb-backup,_netdev 0 0"
+    content = (SYSTEM + "\n" + f"{FSTAB_MARKER} - Created by NAS Mount Manager\n"
+               + format_entry(entry('Daten')) + "\n" + format_entry(entry('Fotos')) + "\n"
+               + foreign + "\n# Kommentar des Admins\n")
+    fstab = Fstab.parse(content)
+    assert fstab.managed == [entry('Daten'), entry('Fotos')]
+
+    rendered = fstab.render([entry('Daten')])
+    assert foreign in rendered
+    assert "# Kommentar des Admins" in rendered
+    assert format_entry(entry('Fotos')) not in rendered
+    assert Fstab.parse(rendered).managed == [entry('Daten')]
+
+
+def test_render_adds_block_to_fstab_without_one():
+    rendered = Fstab.parse(SYSTEM + "\n\n").render([entry('Daten')])
+    assert rendered == f"{SYSTEM}\n{BLOCK_HEADER}\n{format_entry(entry('Daten'))}\n{BLOCK_FOOTER}\n"
+
+
+def test_render_without_entries_removes_block():
+    fstab = Fstab.parse(Fstab.parse(SYSTEM).render([entry('Daten'), entry('Fotos')]))
+    assert fstab.has_block
+    assert fstab.render([]) == SYSTEM
+
+
+def test_unchanged_entries_have_no_diff():
+    fstab = Fstab.parse(Fstab.parse(SYSTEM).render([entry('Daten'), entry('Fotos')]))
+    diff = diff_entries(fstab.managed, [entry('Fotos'), entry('Daten')])
+    assert not has_changes(diff)
+    assert sorted(diff.unchanged) == sorted([entry('Daten'), entry('Fotos')])
+
+
+def test_changed_options_are_reported():
+    changed = entry('Daten')._replace(options=OPTIONS + ',vers=3.0')
+    diff = diff_entries([entry('Daten'), entry('Fotos')], [changed])
+    assert diff.changed == [(entry('Daten'), changed)]
+    assert diff.removed == [entry('Fotos')]
+
+
+def test_spaces_roundtrip_as_octal_escape():
+    spaced = entry('My Data')
+    line = format_entry(spaced)
+    assert '//192.168.0.11/My\\040Data /mnt/nas/My\\040Data ' in line
+    assert parse_entry(line) == spaced
+
+
+def test_backup_files_ignores_foreign_backups(tmp_path):
+    path = tmp_path / 'fstab'
+    path.write_text(SYSTEM)
+    own = [tmp_path / 'fstab.backup.20240101_120000', tmp_path / 'fstab.backup.20240102_120000']
+    for backup in own + [tmp_path / 'fstab.backup.2019-01-01', tmp_path / 'fstab.backup.20240101_120000.orig']:
+        backup.write_text(SYSTEM)
+    assert FstabManager(helper=None, fstab_path=str(path)).backup_files() == [str(backup) for backup in own]
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Tests für den Abgleich: was wird gemountet, neu gemountet und als veraltet ausgehängt."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nas_mount_core import NASMountCore, PrivilegedHelper, plan_reconcile  # noqa: E402
+from nas_mount_table import MountEntry  # noqa: E402
+
+HOST = '192.168.0.11'
+BASE = '/mnt/nas'
+
+
+def cifs(source, mount_point):
+    return MountEntry(1, 1, '0:99', '/', mount_point, 'rw', 'cifs', source, 'rw,vers=3.0')
+
+
+def test_missing_share_is_mounted():
+    plan = plan_reconcile(HOST, ['Daten', 'My Fotos'], BASE, [cifs(f"//{HOST}/Daten", f"{BASE}/Daten")])
+    assert plan.to_mount == ['My Fotos']
+    assert plan.unchanged == ['Daten']
+    assert plan.stale == [] and plan.to_remount == []
+
+
+def test_source_comparison_ignores_case():
+    plan = plan_reconcile(HOST, ['Daten'], BASE, [cifs(f"//{HOST}/DATEN", f"{BASE}/Daten/")])
+    assert plan.unchanged == ['Daten']
+
+
+def test_same_mount_point_with_other_source_is_remounted():
+    plan = plan_reconcile(HOST, ['Daten'], BASE, [cifs("//192.168.0.20/Daten", f"{BASE}/Daten")])
+    assert plan.to_remount == ['Daten']
+    assert plan.to_remount_points == [f"{BASE}/Daten"]
+    assert plan.to_mount == [] and plan.stale == []
+
+
+def test_share_gone_from_host_is_stale():
+    mounts = [cifs(f"//{HOST}/Daten", f"{BASE}/Daten"), cifs(f"//{HOST}/Alt", f"{BASE}/Alt")]
+    plan = plan_reconcile(HOST, ['Daten'], BASE, mounts)
+    assert plan.stale == [f"{BASE}/Alt"]
+    assert plan.unchanged == ['Daten']
+
+
+def test_mounts_of_other_hosts_are_not_touched():
+    plan = plan_reconcile(HOST, ['Daten'], BASE, [cifs("//192.168.0.20/Backup", f"{BASE}/Backup")])
+    assert plan.stale == []
+    assert plan.to_remount_points == []
+    assert plan.to_mount == ['Daten']
+
+
+@pytest.fixture
+def core(tmp_path):
+    mountinfo = tmp_path / 'mountinfo'
+    mountinfo.write_text(f"40 1 0:99 / {BASE}/Daten rw,relatime - cifs //{HOST}/Daten rw,vers=3.0\n")
+    messages = []
+    core = NASMountCore(helper=PrivilegedHelper(command=['true']), log=messages.append,
+                        cred_file=tmp_path / 'credentials', share_cache_file=None,
+                        mountinfo_path=str(mountinfo), preflight_cache_file=tmp_path / 'preflight')
+    core.messages = messages
+    yield core
+    core.close()
+
+
+def test_empty_share_list_never_prunes(core, monkeypatch):
+    monkeypatch.setattr(core, 'unmount_engine', lambda: pytest.fail("Es darf nichts ausgehängt werden"))
+    result = core.reconcile_host(HOST, [], BASE, 'user', 'secret', prune=True)
+    assert result['unmounted'] == [] and result['mounted'] == []
+    assert any('werden nicht ausgehängt' in message for message in core.messages)
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Tests für das Lesen der smbclient-Ausgabe und den Share-Filter."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nas_mount_core import DEFAULT_CONFIG, Share, ShareFilter, iter_share_records, parse_share_list  # noqa: E402
+
+# So sieht 'smbclient -g -L //host' aus, inkl. Meldungen und der Server/Workgroup-Liste
+OUTPUT = """\
+Disk|Daten|Gemeinsame Daten
+Disk|Archiv|Alte Disk-Images, Disk 2
+Disk| Projekte |mit Leerzeichen
+Disk|Musik|Pop|Rock|Jazz
+Printer|Drucker|Büro
+IPC|IPC$|IPC Service (NAS)
+Disk|ADMIN$|Remote Admin
+Reconnecting with SMB1 for workgroup listing.
+Server|NAS|Synology
+Workgroup|WORKGROUP|NAS
+"""
+
+
+def test_comment_containing_disk_is_kept_as_comment():
+    shares = parse_share_list(OUTPUT)
+    assert Share('Archiv', 'Disk', 'Alte Disk-Images, Disk 2') in shares
+
+
+def test_names_keep_leading_and_trailing_spaces():
+    assert Share(' Projekte ', 'Disk', 'mit Leerzeichen') in parse_share_list(OUTPUT)
+
+
+def test_pipe_in_comment_stays_in_comment():
+    assert Share('Musik', 'Disk', 'Pop|Rock|Jazz') in parse_share_list(OUTPUT)
+
+
+def test_server_workgroup_and_messages_are_skipped():
+    types = {share.type for share in iter_share_records(OUTPUT.splitlines())}
+    assert types == {'Disk', 'Printer', 'IPC'}
+    names = [share.name for share in parse_share_list(OUTPUT)]
+    assert 'NAS' not in names and 'WORKGROUP' not in names
+
+
+def test_default_filter_keeps_disks_and_drops_hidden_shares():
+    share_filter = ShareFilter(DEFAULT_CONFIG['share_include'], DEFAULT_CONFIG['share_exclude'])
+    names = [share.name for share in parse_share_list(OUTPUT, share_filter)]
+    assert names == ['Daten', 'Archiv', ' Projekte ', 'Musik']
+
+
+def test_glob_patterns_ignore_case():
+    share_filter = ShareFilter(include=['foto*', 'Video?'], exclude=['*tmp'])
+    assert share_filter.matches('Fotos')
+    assert share_filter.matches('VIDEO1')
+    assert not share_filter.matches('Videos2')
+    assert not share_filter.matches('Fotos_TMP')
+    assert not share_filter.matches('Daten')
+
+
+def test_regex_patterns_use_search_and_keep_case():
+    share_filter = ShareFilter(include=['re:^Projekt-\\d+$'], exclude=['re:archiv'])
+    assert share_filter.matches('Projekt-42')
+    assert not share_filter.matches('projekt-42')
+    assert not share_filter.matches('Projekt-42-alt')
+    assert ShareFilter(exclude=['re:archiv']).matches('Archiv')
+    assert not ShareFilter(exclude=['re:archiv']).matches('altarchiv')
+
+
+def test_invalid_regex_raises_value_error():
+    with pytest.raises(ValueError):
+        ShareFilter(include=['re:('])
+
+
+def test_filter_key_changes_with_patterns():
+    assert ShareFilter(exclude=['*$']).key != ShareFilter().key
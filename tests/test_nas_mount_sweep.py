@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""Tests für den Netzwerk-Scan: Bereiche auflösen und Ports auf Loopback-Adressen prüfen."""
+
+import os
+import socket
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nas_mount_core import SubnetSweep, expand_targets, is_host_range, probe_smb_hosts  # noqa: E402
+
+
+@pytest.fixture
+def listeners():
+    """Lauscht auf 127.0.0.1 und 127.0.0.3 am selben freien Port (kein SMB-Port, kein root nötig)."""
+    sockets = []
+    first = socket.socket()
+    first.bind(('127.0.0.1', 0))
+    port = first.getsockname()[1]
+    sockets.append(first)
+    third = socket.socket()
+    third.bind(('127.0.0.3', port))
+    sockets.append(third)
+    for sock in sockets:
+        sock.listen()
+    yield port
+    for sock in sockets:
+        sock.close()
+
+
+def test_probe_finds_only_listening_hosts(listeners):
+    found = probe_smb_hosts(expand_targets('127.0.0.1-4'), ports=(listeners,), timeout=1)
+    assert found == {'127.0.0.1': [listeners], '127.0.0.3': [listeners]}
+
+
+def test_sweep_probe_without_engine(listeners):
+    sweep = SubnetSweep(discovery=None, ports=(listeners,), timeout=1, log=lambda message: None)
+    assert sorted(sweep.probe('127.0.0.0/29')) == ['127.0.0.1', '127.0.0.3']
+
+
+def test_expand_cidr_skips_network_and_broadcast():
+    assert expand_targets('192.168.0.0/30') == ['192.168.0.1', '192.168.0.2']
+    assert expand_targets('192.168.0.7/32') == ['192.168.0.7']
+
+
+def test_expand_short_range():
+    assert expand_targets('192.168.0.10-12') == ['192.168.0.10', '192.168.0.11', '192.168.0.12']
+    assert expand_targets(' 192.168.0.254-192.168.1.1 ') == ['192.168.0.254', '192.168.0.255',
+                                                              '192.168.1.0', '192.168.1.1']
+
+
+@pytest.mark.parametrize('spec', ['192.168.0.50-10', '10.0.0.0/8', '10.0.0.0-10.1.0.0', '192.168.0.1-x'])
+def test_invalid_ranges_are_rejected(spec):
+    with pytest.raises(ValueError):
+        expand_targets(spec)
+    assert not is_host_range(spec)
+
+
+def test_single_host_is_no_range():
+    assert not is_host_range('192.168.0.11')
+    assert is_host_range('192.168.0.0/24')